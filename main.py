@@ -4,8 +4,16 @@ FastAPI应用主入口文件 - 兼容版本
 """
 import os
 import sys
-from fastapi import FastAPI
+import datetime
+import math
+import random
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, APIRouter, Body, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 
 # 添加src目录到Python路径
 BASE_DIR = os.path.dirname(__file__)
@@ -2482,11 +2490,13 @@ try:
 except Exception:
     pass
 
-# WebSocket路由
-import websockets
-from src.websocket_handler import websocket_handler
+# WebSocket路由（依赖 websockets 和 Supabase 配置，不可用时不启动WebSocket服务器）
+try:
+    import websockets
+    from src.websocket_handler import websocket_handler
+except Exception:
+    websocket_handler = None
 
-@app.on_event("startup")
 async def startup_event():
     """启动事件"""
     # 启动WebSocket服务器（在后台线程中）
@@ -2514,6 +2524,9 @@ async def startup_event():
     websocket_thread.start()
     time.sleep(1)  # 等待WebSocket服务器启动
 
+if websocket_handler is not None:
+    app.add_event_handler("startup", startup_event)
+
 def main():
     print("Hello from spider!")
 
@@ -0,0 +1,123 @@
+-- SupabaseRepo 使用的数据库对象（生成列、索引和 RPC 函数）
+-- 在 Supabase SQL Editor 中执行；可重复执行。
+-- 未部署时 SupabaseRepo 会识别 42703 / PGRST202 并回退到逐条查询，部署后自动使用。
+
+-- ---------------------------------------------------------------------------
+-- tasks.score：待处理任务的调度分数（SupabaseRepo.get_pending_tasks / claim_tasks 按它排序）
+-- 生成列不能引用 now()，任务等待时长由 created_at 作为次级排序体现；
+-- 只有 scheduled_at 已到的任务可被取出（重试任务的退避时间内不会被再次领取）
+-- ---------------------------------------------------------------------------
+ALTER TABLE tasks
+    ADD COLUMN IF NOT EXISTS score integer
+    GENERATED ALWAYS AS (priority - COALESCE(retry_count, 0) * 10) STORED;
+
+DROP INDEX IF EXISTS tasks_pending_score_idx;
+CREATE INDEX IF NOT EXISTS tasks_pending_due_idx
+    ON tasks (score DESC, created_at, scheduled_at)
+    WHERE status = 'pending';
+
+-- ---------------------------------------------------------------------------
+-- claim_tasks(p_limit)：领取已到计划时间的待处理任务并标记为 running（SupabaseRepo.claim_pending_tasks）
+-- FOR UPDATE SKIP LOCKED 保证多个调度实例不会领取同一任务
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION claim_tasks(p_limit integer)
+RETURNS SETOF tasks
+LANGUAGE sql
+AS $$
+    WITH claimed AS (
+        UPDATE tasks t
+        SET status = 'running',
+            started_at = now()
+        WHERE t.id IN (
+            SELECT id
+            FROM tasks
+            WHERE status = 'pending'
+              AND scheduled_at <= now()
+            ORDER BY score DESC, created_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING t.*
+    )
+    SELECT * FROM claimed ORDER BY score DESC, created_at;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- schedule_product_updates(cutoff, priority)：为 last_updated 早于 cutoff 且没有待处理/执行中任务的商品
+-- 插入待处理任务，返回插入的任务数（SupabaseRepo.schedule_product_updates）
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION schedule_product_updates(cutoff timestamptz, priority integer DEFAULT 1)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    WITH inserted AS (
+        INSERT INTO tasks (product_id, status, priority, scheduled_at)
+        SELECT p.id, 'pending', schedule_product_updates.priority, now()
+        FROM products p
+        WHERE (p.last_updated IS NULL OR p.last_updated < schedule_product_updates.cutoff)
+          AND NOT EXISTS (
+              SELECT 1
+              FROM tasks t
+              WHERE t.product_id = p.id
+                AND t.status IN ('pending', 'running')
+          )
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM inserted;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- count_tasks_grouped()：按状态统计任务数（SupabaseRepo.count_tasks_grouped）
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION count_tasks_grouped()
+RETURNS TABLE (status text, count bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT t.status::text, count(*)
+    FROM tasks t
+    GROUP BY t.status;
+$$;
+
+-- ---------------------------------------------------------------------------
+-- price_trend_agg(product_id, start_ts, interval)：先按 interval（'hour' / 'day' / 'week'）
+-- 对价格取桶均值，再对桶序列计算趋势统计，返回单行（SupabaseRepo.get_trend_aggregate）
+-- 没有价格数据时返回 count = 0 的一行
+-- ---------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION price_trend_agg(product_id bigint, start_ts timestamptz, "interval" text DEFAULT 'day')
+RETURNS TABLE (
+    count integer,
+    first_price double precision,
+    last_price double precision,
+    min_price double precision,
+    max_price double precision,
+    avg_price double precision,
+    stddev_price double precision,
+    first_at timestamptz,
+    last_at timestamptz
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH buckets AS (
+        SELECT date_trunc(price_trend_agg."interval", p.created_at) AS bucket,
+               avg(p.price)::double precision AS price
+        FROM prices p
+        WHERE p.product_id = price_trend_agg.product_id
+          AND p.created_at >= price_trend_agg.start_ts
+        GROUP BY 1
+    )
+    SELECT count(*)::integer,
+           (array_agg(price ORDER BY bucket))[1],
+           (array_agg(price ORDER BY bucket DESC))[1],
+           min(price),
+           max(price),
+           avg(price),
+           stddev_samp(price),
+           min(bucket),
+           max(bucket)
+    FROM buckets;
+$$;
+
+-- 通知 PostgREST 重新加载函数定义
+NOTIFY pgrst, 'reload schema';
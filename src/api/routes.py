@@ -246,7 +246,9 @@ def get_spider_stats():
         return error_response(500, "DATABASE_ERROR", "数据库连接不可用")
     
     try:
-        from ..services.task_scheduler import task_scheduler
+        from ..services.task_scheduler import get_scheduler
+        
+        task_scheduler = get_scheduler()
         
         # 获取调度器统计
         scheduler_stats = task_scheduler.get_stats()
@@ -299,9 +301,9 @@ def create_task(body: TaskCreate, api_key: Optional[str] = Header(None, alias="X
                     created_by = user["id"]
         
         # 使用任务调度器创建任务
-        from ..services.task_scheduler import task_scheduler
+        from ..services.task_scheduler import get_scheduler
         
-        task_id = task_scheduler.add_task(
+        task_id = get_scheduler().add_task(
             product_id=body.product_id,
             priority=int(body.priority or 0)
         )
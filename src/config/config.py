@@ -23,6 +23,7 @@ class Config:
     # Playwright配置
     PLAYWRIGHT_WS_ENDPOINT: str = os.getenv("PLAYWRIGHT_WS_ENDPOINT", "ws://43.133.224.11:20001/")
     BROWSER_MODE: str = os.getenv("BROWSER_MODE", "remote")  # local or remote
+    BROWSER_TIMEOUT: int = int(os.getenv("BROWSER_TIMEOUT", "30000"))  # 毫秒
     
     # 节点配置
     NODE_NAME: Optional[str] = os.getenv("NODE_NAME")
@@ -37,6 +38,9 @@ class Config:
     # 代理配置
     HTTP_PROXY_LIST: str = os.getenv("HTTP_PROXY_LIST", "")
     PLAYWRIGHT_PROXIES: str = os.getenv("PLAYWRIGHT_PROXIES", "")
+    PROXY_SERVER: Optional[str] = os.getenv("PROXY_SERVER")
+    PROXY_USERNAME: Optional[str] = os.getenv("PROXY_USERNAME")
+    PROXY_PASSWORD: Optional[str] = os.getenv("PROXY_PASSWORD")
     
     # 汇率配置
     EXCHANGE_RATES_SOURCE: Optional[str] = os.getenv("EXCHANGE_RATES_SOURCE")
@@ -1,6 +1,7 @@
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime, timezone
 
+from postgrest.exceptions import APIError
 from supabase import Client
 
 from .supabase_client import get_client
@@ -11,6 +12,9 @@ class SupabaseRepo:
         self.client: Client = client or get_client()
         if self.client is None:
             raise RuntimeError("Supabase client not configured. Set SUPABASE_URL and SUPABASE_KEY")
+        # tasks 表是否有 score 生成列，首次查询失败后置为 False
+        # （score 列及 claim_tasks 等 RPC 函数的定义见 sql/supabase_functions.sql）
+        self._tasks_score_column = True
 
     # products
     def get_product(self, product_id: int) -> Optional[Dict[str, Any]]:
@@ -51,19 +55,110 @@ class SupabaseRepo:
         res = self.client.table("prices").insert(payload).select("*").execute()
         return (getattr(res, "data", None) or [])[0]
 
+    def insert_prices(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self.client.table("prices").insert(rows).execute()
+
+    def update_products_last_updated(self, product_ids: List[int]) -> None:
+        if not product_ids:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        self.client.table("products").update({"last_updated": now}).in_("id", product_ids).execute()
+
     # tasks
+    def bulk_create_tasks(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        self.client.table("tasks").insert(rows).execute()
+
+    def get_product_ids_with_open_tasks(self, product_ids: List[int]) -> Set[int]:
+        # 已有待处理或执行中任务的商品ID（周期调度据此避免重复排队）
+        if not product_ids:
+            return set()
+        res = (
+            self.client
+            .table("tasks")
+            .select("product_id")
+            .in_("product_id", product_ids)
+            .in_("status", ["pending", "running"])
+            .execute()
+        )
+        return {row["product_id"] for row in (getattr(res, "data", None) or [])}
+
+    def schedule_product_updates(self, cutoff: datetime, priority: int = 1) -> Optional[int]:
+        # schedule_product_updates 在数据库中为 last_updated 早于 cutoff 且没有待处理/执行中任务的商品
+        # 直接插入待处理任务，只返回插入行数；
+        # 数据库未部署该函数时返回 None，由调用方回退到查询商品再批量插入
+        try:
+            res = self.client.rpc("schedule_product_updates", {"cutoff": cutoff.isoformat(), "priority": priority}).execute()
+        except APIError as e:
+            if getattr(e, "code", None) == "PGRST202":
+                return None
+            raise
+        return int(getattr(res, "data", None) or 0)
+
     def get_pending_tasks(self, limit: int = 10) -> List[Dict[str, Any]]:
+        # 只取已到计划时间（scheduled_at <= now）的任务，重试任务在退避时间内不会被再次取出；
+        # 优先按 score 生成列排序：score = priority - retry_count * 10（GENERATED ALWAYS AS ... STORED），
+        # 由部分索引 ON tasks (score DESC, created_at, scheduled_at) WHERE status = 'pending' 直接提供顺序；
+        # 表中没有 score 列时（42703）回退到 priority/retry_count/created_at 排序
+        now = datetime.now(timezone.utc).isoformat()
+        if self._tasks_score_column:
+            try:
+                res = (
+                    self.client
+                    .table("tasks")
+                    .select("*")
+                    .eq("status", "pending")
+                    .lte("scheduled_at", now)
+                    .order("score", desc=True)
+                    .order("created_at", desc=False)
+                    .limit(limit)
+                    .execute()
+                )
+                return getattr(res, "data", None) or []
+            except APIError as e:
+                if getattr(e, "code", None) != "42703":
+                    raise
+                self._tasks_score_column = False
         res = (
             self.client
             .table("tasks")
             .select("*")
             .eq("status", "pending")
-            .order("scheduled_at", desc=False)
+            .lte("scheduled_at", now)
+            .order("priority", desc=True)
+            .order("retry_count", desc=False)
+            .order("created_at", desc=False)
             .limit(limit)
             .execute()
         )
         return getattr(res, "data", None) or []
 
+    def claim_pending_tasks(self, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        # claim_tasks 在一条 UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING * 中
+        # 领取已到计划时间的待处理任务并标记为 running（按 score DESC, created_at 排序，同 get_pending_tasks），多个调度实例不会重复领取；
+        # 数据库未部署 claim_tasks 函数时返回 None，由调用方回退到 get_pending_tasks + mark_task_running
+        try:
+            res = self.client.rpc("claim_tasks", {"p_limit": limit}).execute()
+        except APIError as e:
+            if getattr(e, "code", None) == "PGRST202":
+                return None
+            raise
+        return getattr(res, "data", None) or []
+
+    def count_tasks_grouped(self) -> Optional[Dict[str, int]]:
+        # count_tasks_grouped 返回 SELECT status, count(*) FROM tasks GROUP BY status 的结果；
+        # 数据库未部署该函数时返回 None，由调用方回退到逐个状态计数
+        try:
+            res = self.client.rpc("count_tasks_grouped", {}).execute()
+        except APIError as e:
+            if getattr(e, "code", None) == "PGRST202":
+                return None
+            raise
+        return {row["status"]: int(row["count"]) for row in (getattr(res, "data", None) or [])}
+
     def mark_task_running(self, task_id: int, source_url: Optional[str] = None) -> None:
         now = datetime.now(timezone.utc).isoformat()
         payload: Dict[str, Any] = {"status": "running", "started_at": now}
@@ -78,10 +173,37 @@ class SupabaseRepo:
             payload["result_message"] = message
         self.client.table("tasks").update(payload).eq("id", task_id).execute()
 
+    def mark_tasks_result(self, task_ids: List[int], status: str, message: Optional[str]) -> None:
+        if not task_ids:
+            return
+        now = datetime.now(timezone.utc).isoformat()
+        payload: Dict[str, Any] = {"status": status, "completed_at": now}
+        if message:
+            payload["result_message"] = message
+        self.client.table("tasks").update(payload).in_("id", task_ids).execute()
+
+    # alert events
+    def insert_alert_events_bulk(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        self.client.table("alert_events").insert(events).execute()
+
     def rpc_prices_aggregate(self, product_ids: List[int], interval: str, start_ts: Optional[str], end_ts: Optional[str]) -> List[Dict[str, Any]]:
         res = self.client.rpc("rpc_prices_aggregate", {"product_ids": product_ids, "interval": interval, "start_ts": start_ts, "end_ts": end_ts}).execute()
         return getattr(res, "data", None) or []
 
+    def get_trend_aggregate(self, product_id: int, start_ts: str, interval: str = "day") -> Optional[Dict[str, Any]]:
+        # 单行返回 count/first_price/last_price/min_price/max_price/avg_price/stddev_price/first_at/last_at；
+        # 数据库未部署 price_trend_agg 函数时返回 None，由调用方回退到下载明细
+        try:
+            res = self.client.rpc("price_trend_agg", {"product_id": product_id, "start_ts": start_ts, "interval": interval}).execute()
+        except APIError as e:
+            if getattr(e, "code", None) == "PGRST202":
+                return None
+            raise
+        data = getattr(res, "data", None) or []
+        return data[0] if data else {}
+
     def storage_upload(self, bucket: str, path: str, data: bytes) -> None:
         self.client.storage.from_(bucket).upload(path, data)
 
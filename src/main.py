@@ -4,6 +4,9 @@ FastAPI应用主入口文件
 """
 import os
 import sys
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,7 +20,7 @@ if src_path not in sys.path:
 from src.config.config import config
 from src.api.routes import router as api_router
 from src.runtime.node_runtime import NodeRuntime
-from src.services.task_scheduler import task_scheduler, periodic_scheduler
+from src.services.task_scheduler import get_scheduler, get_periodic_scheduler, stop_schedulers
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -40,10 +43,30 @@ app.add_middleware(
 # 注册API路由
 app.include_router(api_router, prefix="/api/v1")
 
+def setup_queue_logging() -> QueueListener:
+    """配置根日志器：业务线程只把日志放入队列，由后台线程统一格式化输出"""
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG if config.DEBUG else logging.INFO)
+    
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+log_listener = None
+
 # 启动事件
 @app.on_event("startup")
 async def startup_event():
     """应用启动时的初始化操作"""
+    global log_listener
+    if log_listener is None:
+        log_listener = setup_queue_logging()
+    
     print("🚀 Price Memory API 启动中...")
     
     # 启动节点运行时
@@ -55,8 +78,8 @@ async def startup_event():
             
             # 启动任务调度器
             if config.AUTO_CONSUME_QUEUE:
-                task_scheduler.start()
-                periodic_scheduler.start()
+                get_scheduler().start()
+                get_periodic_scheduler().start()
                 print("✅ 任务调度器已启动")
         else:
             print("⚠️  Supabase配置缺失，跳过节点运行时启动")
@@ -72,11 +95,14 @@ async def shutdown_event():
     
     # 停止任务调度器
     try:
-        task_scheduler.stop()
-        periodic_scheduler.stop()
+        stop_schedulers()
         print("✅ 任务调度器已停止")
     except Exception as e:
         print(f"❌ 停止任务调度器失败: {e}")
+    
+    # 输出剩余日志
+    if log_listener is not None:
+        log_listener.stop()
 
 # 健康检查端点
 @app.get("/health")
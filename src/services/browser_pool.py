@@ -0,0 +1,70 @@
+"""
+浏览器池
+保持若干已启动的浏览器，每个抓取器在其上使用独立的浏览器上下文，避免每个任务都启动浏览器
+"""
+import asyncio
+from typing import List, Optional
+
+from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext
+
+from .enhanced_price_scraper import ScrapingConfig, launch_browser
+
+
+class BrowserPool:
+    """浏览器池（只在同一个事件循环中使用）"""
+    
+    def __init__(self, config: ScrapingConfig, size: int = 1):
+        self.config = config
+        self.size = max(1, size)
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[Browser] = []
+        self._next = 0  # 轮流分配上下文的浏览器下标
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> BrowserContext:
+        """
+        获取一个新的浏览器上下文（浏览器数未达上限时先启动新浏览器，否则轮流使用已启动的浏览器）
+        
+        Returns:
+            浏览器上下文，用完后调用 release 关闭
+        """
+        async with self._lock:
+            # 移除已断开（崩溃）的浏览器
+            self._browsers = [browser for browser in self._browsers if browser.is_connected()]
+            
+            if len(self._browsers) < self.size:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                browser = await launch_browser(self._playwright, self.config)
+                self._browsers.append(browser)
+            else:
+                self._next = (self._next + 1) % len(self._browsers)
+                browser = self._browsers[self._next]
+        
+        return await browser.new_context()
+    
+    async def release(self, context: BrowserContext) -> None:
+        """
+        关闭浏览器上下文（浏览器保持运行）
+        
+        Args:
+            context: acquire 返回的浏览器上下文
+        """
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"关闭浏览器上下文时出错: {e}")
+    
+    async def close(self) -> None:
+        """关闭所有浏览器"""
+        async with self._lock:
+            for browser in self._browsers:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    print(f"关闭浏览器时出错: {e}")
+            self._browsers.clear()
+            
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
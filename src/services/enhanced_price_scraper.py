@@ -12,13 +12,17 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from urllib.parse import urlparse, urljoin
 
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import async_playwright, Page, Playwright, Browser, BrowserContext
 from playwright_stealth import stealth_async
 
 from ..config.config import config
 from ..utils.url_util import is_valid_url, get_base_url
 
 
+# 价格文本中的货币符号
+_CURRENCY_BY_SYMBOL = {'$': 'USD', '£': 'GBP', '€': 'EUR', '￥': 'CNY', '¥': 'CNY'}
+
+
 @dataclass
 class PriceResult:
     """价格结果数据类"""
@@ -44,11 +48,47 @@ class ScrapingConfig:
     headless: bool = True
 
 
+async def launch_browser(playwright: Playwright, scraping_config: ScrapingConfig) -> Browser:
+    """
+    按抓取配置启动浏览器
+    
+    Args:
+        playwright: Playwright 实例
+        scraping_config: 抓取配置
+        
+    Returns:
+        已启动的浏览器
+    """
+    launch_options = {
+        'headless': scraping_config.headless,
+        'args': [
+            '--disable-blink-features=AutomationControlled',
+            '--no-sandbox',
+            '--disable-setuid-sandbox',
+            '--disable-dev-shm-usage',
+            '--disable-accelerated-2d-canvas',
+            '--no-first-run',
+            '--no-zygote',
+            '--disable-gpu'
+        ]
+    }
+    
+    if scraping_config.use_proxy and config.PROXY_SERVER:
+        launch_options['proxy'] = {
+            'server': config.PROXY_SERVER,
+            'username': config.PROXY_USERNAME,
+            'password': config.PROXY_PASSWORD
+        }
+    
+    return await playwright.chromium.launch(**launch_options)
+
+
 class EnhancedPriceScraper:
     """增强的价格抓取器"""
     
     def __init__(self, config: ScrapingConfig):
         self.config = config
+        self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
@@ -59,34 +99,20 @@ class EnhancedPriceScraper:
             'average_response_time': 0
         }
     
-    async def initialize(self) -> None:
-        """初始化浏览器"""
+    async def initialize(self, context: Optional[BrowserContext] = None) -> None:
+        """
+        初始化浏览器
+        
+        Args:
+            context: 外部（如浏览器池）提供的浏览器上下文；为空时自行启动浏览器，关闭时一并关闭
+        """
         try:
-            self.browser = await async_playwright().start()
-            
-            # 配置浏览器选项
-            browser_options = {
-                'headless': self.config.headless,
-                'args': [
-                    '--disable-blink-features=AutomationControlled',
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
-            }
-            
-            if self.config.use_proxy and config.PROXY_SERVER:
-                browser_options['proxy'] = {
-                    'server': config.PROXY_SERVER,
-                    'username': config.PROXY_USERNAME,
-                    'password': config.PROXY_PASSWORD
-                }
-            
-            self.context = await self.browser.new_context(**browser_options)
+            if context is None:
+                self.playwright = await async_playwright().start()
+                self.browser = await launch_browser(self.playwright, self.config)
+                self.context = await self.browser.new_context()
+            else:
+                self.context = context
             
             # 设置用户代理
             await self.context.set_extra_http_headers({
@@ -114,14 +140,14 @@ class EnhancedPriceScraper:
             raise
     
     async def close(self) -> None:
-        """关闭浏览器"""
+        """关闭浏览器（外部提供的上下文由提供方关闭）"""
         try:
             if self.page:
                 await self.page.close()
-            if self.context:
-                await self.context.close()
             if self.browser:
-                await self.browser.close()
+                await self.browser.close()  # 同时关闭其上的上下文
+            if self.playwright:
+                await self.playwright.stop()
         except Exception as e:
             print(f"关闭浏览器时出错: {e}")
     
@@ -641,25 +667,11 @@ class EnhancedPriceScraper:
         text = text.strip().replace('\n', ' ').replace('\t', ' ')
         text = re.sub(r'\s+', ' ', text)
         
-        # 检测货币符号
-        currency = None
-        if '$' in text:
-            currency = "USD"
-            # 移除非数字字符（保留数字、小数点、逗号）
-            price_text = re.sub(r'[^\d.,]', '', text)
-        elif '£' in text:
-            currency = "GBP"
-            price_text = re.sub(r'[^\d.,]', '', text)
-        elif '€' in text:
-            currency = "EUR"
-            price_text = re.sub(r'[^\d.,]', '', text)
-        elif '￥' in text or '¥' in text:
-            currency = "CNY"
-            price_text = re.sub(r'[^\d.,]', '', text)
-        else:
-            # 尝试提取纯数字
-            price_text = re.sub(r'[^\d.,]', '', text)
-            currency = "USD"  # 默认货币
+        # 检测货币符号（取最先出现的符号，默认美元）
+        currency = next((_CURRENCY_BY_SYMBOL[ch] for ch in text if ch in _CURRENCY_BY_SYMBOL), "USD")
+        
+        # 移除非数字字符（保留数字、小数点、逗号）
+        price_text = re.sub(r'[^\d.,]', '', text)
         
         if not price_text:
             return None, currency
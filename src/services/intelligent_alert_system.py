@@ -3,24 +3,54 @@
 实现多种告警规则、多渠道推送和智能冷却机制
 """
 import asyncio
-import json
-import smtplib
-import requests
+import logging
+import statistics
+import aiohttp
+import aiosmtplib
+import orjson
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, asdict
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from dataclasses import dataclass, field
 import hashlib
 import hmac
-import base64
+import time
 
 from ..config.config import config
 from ..dao.supabase_repo import SupabaseRepo
 
+# 告警消息模板（按规则类型）
+ALERT_MESSAGE_TEMPLATES = {
+    'price_drop': "价格下降告警：当前价格 {price} {currency}",
+    'price_rise': "价格上涨告警：当前价格 {price} {currency}",
+    'price_threshold': "价格阈值告警：当前价格 {price} {currency}",
+    'percent_change': "价格变动告警：当前价格 {price} {currency}",
+    'anomaly': "价格异常告警：当前价格 {price} {currency}"
+}
+DEFAULT_ALERT_MESSAGE_TEMPLATE = "价格告警：当前价格 {price} {currency}"
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+def _change_percent(price: float, last_price: float) -> float:
+    """计算相对上次价格的变化百分比"""
+    return ((price - last_price) / last_price) * 100
+
+
+def _is_price_anomaly(price: float, recent_prices: List[float], z_threshold: float) -> bool:
+    """使用Z-score判断价格是否异常"""
+    if len(recent_prices) < 10:
+        return False
+    
+    mean_price = statistics.mean(recent_prices)
+    std_price = statistics.stdev(recent_prices)
+    
+    if std_price > 0:
+        return abs((price - mean_price) / std_price) > z_threshold
+    
+    return False
+
+
+@dataclass(slots=True)
 class AlertRule:
     """告警规则数据类"""
     id: int
@@ -35,9 +65,16 @@ class AlertRule:
     status: str = 'active'
     created_at: Optional[datetime] = None
     last_triggered_at: Optional[datetime] = None
+    # 冷却截止时间（time.monotonic() 时钟）
+    _cooldown_deadline: float = field(default=0.0, init=False, repr=False)
+    # 告警消息模板（加载规则时按 rule_type 选定）
+    _msg_template: str = field(default=DEFAULT_ALERT_MESSAGE_TEMPLATE, init=False, repr=False)
+    # 预编译的条件检查函数及其是否依赖历史价格
+    _check: Optional[Callable[[float, Optional[List[float]]], bool]] = field(default=None, init=False, repr=False)
+    _needs_history: bool = field(default=False, init=False, repr=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class AlertEvent:
     """告警事件数据类"""
     alert_id: int
@@ -53,7 +90,7 @@ class AlertEvent:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AlertMetrics:
     """告警指标数据类"""
     total_alerts: int
@@ -65,17 +102,14 @@ class AlertMetrics:
 
 
 class IntelligentAlertSystem:
-    """智能告警系统"""
+    """智能告警系统
+    
+    告警事件在后台批量写入，持有者必须在事件循环结束前 await close()
+    （或使用 async with），否则队列中尚未写入的事件会丢失。
+    """
     
     def __init__(self):
         self.repo = SupabaseRepo()
-        self.alert_handlers = {
-            'price_drop': self._handle_price_drop_alert,
-            'price_rise': self._handle_price_rise_alert,
-            'price_threshold': self._handle_price_threshold_alert,
-            'percent_change': self._handle_percent_change_alert,
-            'anomaly': self._handle_anomaly_alert
-        }
         self.notification_senders = {
             'email': self._send_email_notification,
             'webhook': self._send_webhook_notification,
@@ -84,9 +118,58 @@ class IntelligentAlertSystem:
         }
         
         # 告警缓存（减少数据库查询）
-        self.alert_cache: Dict[int, List[AlertRule]] = {}
+        self.alert_cache: Dict[int, Tuple[List[AlertRule], List[AlertRule]]] = {}
         self.cache_ttl = 300  # 5分钟缓存
         self.last_cache_update: Dict[int, datetime] = {}
+        
+        # 共享HTTP会话（复用连接池）
+        self._http: Optional[aiohttp.ClientSession] = None
+        
+        # 持久SMTP连接（同一连接不能并发发送，需加锁）
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_lock = asyncio.Lock()
+        
+        # 告警事件批量写入队列（后台任务按数量或时间间隔刷新）
+        # 队列和刷新任务在首次记录事件时于当前事件循环中创建
+        self._event_queue: Optional[asyncio.Queue[Optional[Dict[str, Any]]]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self.event_batch_size = 500
+        self.event_flush_interval = 0.25  # 秒
+        
+        # Webhook签名模板（密钥只编码一次，每次调用copy()复用内部状态）
+        self._hmac_template: Optional[hmac.HMAC] = (
+            hmac.new(config.ALERT_WEBHOOK_SECRET.encode(), digestmod=hashlib.sha256)
+            if config.ALERT_WEBHOOK_SECRET else None
+        )
+    
+    async def __aenter__(self) -> "IntelligentAlertSystem":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """写入剩余告警事件，并关闭共享HTTP会话和SMTP连接"""
+        flush_task = self._flush_task
+        if (flush_task is not None and not flush_task.done()
+                and flush_task.get_loop() is asyncio.get_running_loop()):
+            await self._event_queue.put(None)
+            await flush_task
+            self._flush_task = None
+            self._event_queue = None
+        else:
+            await self._write_orphaned_events()
+        
+        if self._http and not self._http.closed:
+            await self._http.close()
+        self._http = None
+        
+        if self._smtp and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                pass
+        self._smtp = None
     
     async def process_price_update(self, product_id: int, price: float, 
                                  currency: str, metadata: Optional[Dict[str, Any]] = None) -> List[AlertEvent]:
@@ -105,35 +188,44 @@ class IntelligentAlertSystem:
         triggered_events = []
         
         try:
-            # 获取该商品的所有活跃告警规则
-            alert_rules = await self._get_product_alert_rules(product_id)
-            
-            for rule in alert_rules:
-                # 检查冷却时间
-                if self._is_in_cooldown(rule):
-                    continue
-                
-                # 检查是否触发告警
-                if await self._check_alert_condition(rule, product_id, price, currency):
-                    # 创建告警事件
-                    event = await self._create_alert_event(rule, price, currency, metadata)
-                    
-                    # 发送通知
-                    sent_channels = await self._send_notifications(event)
-                    
-                    # 更新告警状态
-                    await self._update_alert_status(rule, price, currency)
-                    
-                    # 记录事件
-                    await self._record_alert_event(event, sent_channels)
-                    
-                    triggered_events.append(event)
-        
-        except Exception as e:
-            print(f"处理价格更新告警失败: {e}")
+            # 获取该商品的所有活跃告警规则（已按是否依赖历史价格分组）
+            cheap_rules, history_rules = await self._get_product_alert_rules(product_id)
+            
+            # 先检查只需比较当前价格的规则
+            for rule in cheap_rules:
+                if not self._is_in_cooldown(rule) and rule._check(price, None):
+                    triggered_events.append(await self._trigger_alert(rule, price, currency, metadata))
+            
+            # 仅在存在未冷却的历史规则时查询一次近期价格
+            pending_rules = [rule for rule in history_rules if not self._is_in_cooldown(rule)]
+            if pending_rules:
+                recent_prices = await self._get_recent_prices(product_id)
+                for rule in pending_rules:
+                    if rule._check(price, recent_prices):
+                        triggered_events.append(await self._trigger_alert(rule, price, currency, metadata))
+        
+        except Exception:
+            logger.error("处理价格更新告警失败", exc_info=True)
         
         return triggered_events
     
+    async def _trigger_alert(self, rule: AlertRule, price: float, currency: str,
+                             metadata: Optional[Dict[str, Any]]) -> AlertEvent:
+        """触发告警：创建事件、发送通知、更新状态并记录事件"""
+        # 创建告警事件
+        event = await self._create_alert_event(rule, price, currency, metadata)
+        
+        # 发送通知
+        sent_channels = await self._send_notifications(event)
+        
+        # 更新告警状态
+        await self._update_alert_status(rule, price, currency)
+        
+        # 记录事件
+        await self._record_alert_event(event, sent_channels)
+        
+        return event
+    
     async def create_alert_rule(self, user_id: int, product_id: int, rule_type: str,
                                threshold: Optional[float] = None, percent: Optional[float] = None,
                                cooldown_minutes: int = 60, channels: List[str] = None,
@@ -168,15 +260,15 @@ class IntelligentAlertSystem:
                 'created_at': datetime.utcnow()
             }
             
-            rule_id = self.repo.create_alert_rule(rule_data)
+            rule_id = await self._repo("create_alert_rule", rule_data)
             
             # 清除缓存
             self._clear_alert_cache(product_id)
             
             return rule_id
             
-        except Exception as e:
-            print(f"创建告警规则失败: {e}")
+        except Exception:
+            logger.exception("创建告警规则失败")
             return None
     
     async def update_alert_rule(self, rule_id: int, updates: Dict[str, Any]) -> bool:
@@ -191,18 +283,18 @@ class IntelligentAlertSystem:
             是否更新成功
         """
         try:
-            success = self.repo.update_alert_rule(rule_id, updates)
+            success = await self._repo("update_alert_rule", rule_id, updates)
             
             if success:
                 # 清除相关缓存
-                rule = self.repo.get_alert_rule(rule_id)
+                rule = await self._repo("get_alert_rule", rule_id)
                 if rule:
                     self._clear_alert_cache(rule['product_id'])
             
             return success
             
-        except Exception as e:
-            print(f"更新告警规则失败: {e}")
+        except Exception:
+            logger.exception("更新告警规则失败")
             return False
     
     async def delete_alert_rule(self, rule_id: int) -> bool:
@@ -216,19 +308,19 @@ class IntelligentAlertSystem:
             是否删除成功
         """
         try:
-            rule = self.repo.get_alert_rule(rule_id)
+            rule = await self._repo("get_alert_rule", rule_id)
             if not rule:
                 return False
             
-            success = self.repo.delete_alert_rule(rule_id)
+            success = await self._repo("delete_alert_rule", rule_id)
             
             if success:
                 self._clear_alert_cache(rule['product_id'])
             
             return success
             
-        except Exception as e:
-            print(f"删除告警规则失败: {e}")
+        except Exception:
+            logger.exception("删除告警规则失败")
             return False
     
     async def get_alert_metrics(self, user_id: int, days: int = 30) -> AlertMetrics:
@@ -246,10 +338,10 @@ class IntelligentAlertSystem:
             start_date = datetime.utcnow() - timedelta(days=days)
             
             # 获取用户的所有告警规则
-            total_alerts = self.repo.count_user_alert_rules(user_id)
+            total_alerts = await self._repo("count_user_alert_rules", user_id)
             
             # 获取触发的告警事件
-            triggered_events = self.repo.get_alert_events(user_id, start_date)
+            triggered_events = await self._repo("get_alert_events", user_id, start_date)
             
             # 统计发送状态
             sent_events = len([e for e in triggered_events if e['status'] == 'sent'])
@@ -277,11 +369,11 @@ class IntelligentAlertSystem:
                 average_response_time=average_response_time
             )
             
-        except Exception as e:
-            print(f"获取告警指标失败: {e}")
+        except Exception:
+            logger.exception("获取告警指标失败")
             return AlertMetrics(0, 0, 0, 0, 0, 0)
     
-    async def _get_product_alert_rules(self, product_id: int) -> List[AlertRule]:
+    async def _get_product_alert_rules(self, product_id: int) -> Tuple[List[AlertRule], List[AlertRule]]:
         """
         获取商品的告警规则（带缓存）
         
@@ -289,7 +381,7 @@ class IntelligentAlertSystem:
             product_id: 商品ID
             
         Returns:
-            告警规则列表
+            (只需当前价格的规则列表, 依赖历史价格的规则列表)
         """
         current_time = datetime.utcnow()
         
@@ -300,12 +392,13 @@ class IntelligentAlertSystem:
                     return self.alert_cache[product_id]
         
         # 从数据库获取
-        rules_data = self.repo.get_product_alert_rules(product_id)
+        rules_data = await self._repo("get_product_alert_rules", product_id)
         
-        # 转换为AlertRule对象
-        rules = []
+        # 转换为AlertRule对象，并按是否依赖历史价格分组
+        cheap_rules: List[AlertRule] = []
+        history_rules: List[AlertRule] = []
         for rule_data in rules_data:
-            rules.append(AlertRule(
+            rule = AlertRule(
                 id=rule_data['id'],
                 user_id=rule_data['user_id'],
                 product_id=rule_data['product_id'],
@@ -318,13 +411,17 @@ class IntelligentAlertSystem:
                 status=rule_data.get('status', 'active'),
                 created_at=rule_data.get('created_at'),
                 last_triggered_at=rule_data.get('last_triggered_at')
-            ))
+            )
+            rule._cooldown_deadline = self._initial_cooldown_deadline(rule)
+            rule._msg_template = ALERT_MESSAGE_TEMPLATES.get(rule.rule_type, DEFAULT_ALERT_MESSAGE_TEMPLATE)
+            rule._check, rule._needs_history = self._compile_check(rule)
+            (history_rules if rule._needs_history else cheap_rules).append(rule)
         
         # 更新缓存
-        self.alert_cache[product_id] = rules
+        self.alert_cache[product_id] = (cheap_rules, history_rules)
         self.last_cache_update[product_id] = current_time
         
-        return rules
+        return cheap_rules, history_rules
     
     def _is_in_cooldown(self, rule: AlertRule) -> bool:
         """
@@ -336,104 +433,74 @@ class IntelligentAlertSystem:
         Returns:
             是否在冷却期
         """
-        if not rule.last_triggered_at:
-            return False
-        
-        cooldown_end = rule.last_triggered_at + timedelta(minutes=rule.cooldown_minutes)
-        return datetime.utcnow() < cooldown_end
+        return time.monotonic() < rule._cooldown_deadline
     
-    async def _check_alert_condition(self, rule: AlertRule, product_id: int, 
-                                   price: float, currency: str) -> bool:
+    def _initial_cooldown_deadline(self, rule: AlertRule) -> float:
         """
-        检查告警条件是否满足
+        将数据库中的最后触发时间换算为单调时钟上的冷却截止时间
         
         Args:
             rule: 告警规则
-            product_id: 商品ID
-            price: 当前价格
-            currency: 货币代码
             
         Returns:
-            条件是否满足
+            冷却截止时间（time.monotonic() 时钟）
         """
-        handler = self.alert_handlers.get(rule.rule_type)
-        if not handler:
-            return False
-        
-        return await handler(rule, product_id, price, currency)
-    
-    async def _handle_price_drop_alert(self, rule: AlertRule, product_id: int, 
-                                     price: float, currency: str) -> bool:
-        """处理价格下降告警"""
-        if rule.threshold:
-            return price <= rule.threshold
-        
-        if rule.percent:
-            # 获取历史价格进行比较
-            price_history = self.repo.get_price_history(product_id, limit=10)
-            if len(price_history) > 1:
-                last_price = float(price_history[0]['price'])
-                change_percent = ((price - last_price) / last_price) * 100
-                return change_percent <= -abs(rule.percent)
-        
-        return False
-    
-    async def _handle_price_rise_alert(self, rule: AlertRule, product_id: int, 
-                                     price: float, currency: str) -> bool:
-        """处理价格上涨告警"""
-        if rule.threshold:
-            return price >= rule.threshold
+        last_triggered_at = rule.last_triggered_at
+        if not last_triggered_at:
+            return 0.0
         
-        if rule.percent:
-            # 获取历史价格进行比较
-            price_history = self.repo.get_price_history(product_id, limit=10)
-            if len(price_history) > 1:
-                last_price = float(price_history[0]['price'])
-                change_percent = ((price - last_price) / last_price) * 100
-                return change_percent >= abs(rule.percent)
+        if isinstance(last_triggered_at, str):
+            last_triggered_at = datetime.fromisoformat(last_triggered_at.replace('Z', '+00:00'))
         
-        return False
-    
-    async def _handle_price_threshold_alert(self, rule: AlertRule, product_id: int, 
-                                          price: float, currency: str) -> bool:
-        """处理价格阈值告警"""
-        if rule.threshold:
-            return price <= rule.threshold or price >= rule.threshold
-        return False
-    
-    async def _handle_percent_change_alert(self, rule: AlertRule, product_id: int, 
-                                         price: float, currency: str) -> bool:
-        """处理百分比变化告警"""
-        if rule.percent:
-            price_history = self.repo.get_price_history(product_id, limit=10)
-            if len(price_history) > 1:
-                last_price = float(price_history[0]['price'])
-                change_percent = abs((price - last_price) / last_price) * 100
-                return change_percent >= abs(rule.percent)
-        return False
+        now = datetime.now(last_triggered_at.tzinfo) if last_triggered_at.tzinfo else datetime.utcnow()
+        elapsed = (now - last_triggered_at).total_seconds()
+        return time.monotonic() + rule.cooldown_minutes * 60 - elapsed
     
-    async def _handle_anomaly_alert(self, rule: AlertRule, product_id: int, 
-                                  price: float, currency: str) -> bool:
-        """处理异常检测告警"""
-        # 获取近期价格数据
-        price_history = self.repo.get_price_history(product_id, limit=30)
-        
-        if len(price_history) < 10:
-            return False
-        
-        prices = [float(p['price']) for p in price_history]
-        
-        # 使用Z-score检测异常
-        mean_price = statistics.mean(prices)
-        std_price = statistics.stdev(prices) if len(prices) > 1 else 0
+    def _compile_check(self, rule: AlertRule) -> Tuple[Callable[[float, Optional[List[float]]], bool], bool]:
+        """
+        为告警规则生成预绑定参数的检查函数
         
-        if std_price > 0:
-            z_score = abs((price - mean_price) / std_price)
+        Args:
+            rule: 告警规则
+            
+        Returns:
+            (检查函数, 是否需要历史价格)，检查函数签名为 check(price, recent_prices)，
+            recent_prices 为近期价格列表（最新在前）
+        """
+        rule_type = rule.rule_type
+        threshold = rule.threshold
+        percent = abs(rule.percent) if rule.percent else None
+        
+        if rule_type == 'price_drop':
+            if threshold:
+                return (lambda price, recent_prices: price <= threshold), False
+            if percent:
+                return (lambda price, recent_prices: len(recent_prices) > 1
+                        and _change_percent(price, recent_prices[0]) <= -percent), True
+        elif rule_type == 'price_rise':
+            if threshold:
+                return (lambda price, recent_prices: price >= threshold), False
+            if percent:
+                return (lambda price, recent_prices: len(recent_prices) > 1
+                        and _change_percent(price, recent_prices[0]) >= percent), True
+        elif rule_type == 'price_threshold':
+            if threshold:
+                return (lambda price, recent_prices: price <= threshold or price >= threshold), False
+        elif rule_type == 'percent_change':
+            if percent:
+                return (lambda price, recent_prices: len(recent_prices) > 1
+                        and abs(_change_percent(price, recent_prices[0])) >= percent), True
+        elif rule_type == 'anomaly':
             # 默认阈值为3（99.7%置信度）
-            threshold = rule.threshold or 3.0
-            return z_score > threshold
+            z_threshold = threshold or 3.0
+            return (lambda price, recent_prices: _is_price_anomaly(price, recent_prices, z_threshold)), True
         
-        return False
+        return (lambda price, recent_prices: False), False
+    
+    async def _get_recent_prices(self, product_id: int) -> List[float]:
+        """获取近期价格（最新在前），供需要历史数据的规则共用"""
+        price_history = await self._repo("get_price_history", product_id, limit=30)
+        return [float(p['price']) for p in price_history]
     
     async def _create_alert_event(self, rule: AlertRule, price: float, 
                                 currency: str, metadata: Optional[Dict[str, Any]]) -> AlertEvent:
@@ -453,29 +520,23 @@ class IntelligentAlertSystem:
     
     def _generate_alert_message(self, rule: AlertRule, price: float, currency: str) -> str:
         """生成告警消息"""
-        message_templates = {
-            'price_drop': f"价格下降告警：当前价格 {price} {currency}",
-            'price_rise': f"价格上涨告警：当前价格 {price} {currency}",
-            'price_threshold': f"价格阈值告警：当前价格 {price} {currency}",
-            'percent_change': f"价格变动告警：当前价格 {price} {currency}",
-            'anomaly': f"价格异常告警：当前价格 {price} {currency}"
-        }
-        
-        return message_templates.get(rule.rule_type, f"价格告警：当前价格 {price} {currency}")
+        return rule._msg_template.format(price=price, currency=currency)
     
     async def _send_notifications(self, event: AlertEvent) -> List[str]:
         """发送通知"""
         sent_channels = []
         
-        for channel in event.channels:
-            sender = self.notification_senders.get(channel)
-            if sender:
-                try:
-                    await sender(event)
-                    sent_channels.append(channel)
-                except Exception as e:
-                    print(f"发送 {channel} 通知失败: {e}")
-                    event.error_message = str(e)
+        # 各渠道并发发送，耗时取决于最慢的渠道
+        tasks = [(channel, self.notification_senders[channel](event))
+                 for channel in event.channels if channel in self.notification_senders]
+        results = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
+        
+        for (channel, _), result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error("发送 %s 通知失败: %s", channel, result)
+                event.error_message = str(result)
+            else:
+                sent_channels.append(channel)
         
         return sent_channels
     
@@ -484,14 +545,14 @@ class IntelligentAlertSystem:
         if not config.SMTP_HOST or not config.SMTP_USER or not config.SMTP_PASS:
             raise Exception("SMTP配置不完整")
         
-        targets = self.repo.get_alert_targets(event.alert_id)
+        targets = await self._repo("get_alert_targets", event.alert_id)
         email_target = targets.get('email')
         
         if not email_target:
             raise Exception("未配置邮件接收地址")
         
         # 获取商品信息
-        product = self.repo.get_product(event.product_id)
+        product = await self._repo("get_product", event.product_id)
         product_name = product.get('name', '未知商品') if product else '未知商品'
         
         # 构建邮件内容
@@ -508,20 +569,26 @@ class IntelligentAlertSystem:
         Price Memory 智能告警系统
         """
         
-        # 发送邮件
+        # 发送邮件（email.mime 仅在需要发邮件时导入）
+        from email.mime.text import MIMEText
         msg = MIMEText(body, 'plain', 'utf-8')
         msg['Subject'] = subject
         msg['From'] = config.SMTP_FROM or config.SMTP_USER
         msg['To'] = email_target
         
-        with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT) as server:
-            server.starttls()
-            server.login(config.SMTP_USER, config.SMTP_PASS)
-            server.send_message(msg)
+        async with self._smtp_lock:
+            smtp = await self._get_smtp()
+            try:
+                await smtp.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                # 连接被服务器关闭，重连后重试一次
+                self._smtp = None
+                smtp = await self._get_smtp()
+                await smtp.send_message(msg)
     
     async def _send_webhook_notification(self, event: AlertEvent) -> None:
         """发送Webhook通知"""
-        targets = self.repo.get_alert_targets(event.alert_id)
+        targets = await self._repo("get_alert_targets", event.alert_id)
         webhook_url = targets.get('webhook')
         
         if not webhook_url:
@@ -540,25 +607,24 @@ class IntelligentAlertSystem:
             'timestamp': event.created_at.isoformat()
         }
         
+        # 只序列化一次（键排序保证字节规范），签名与发送使用同一份字节
+        payload_bytes = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        
         # 添加签名（如果配置了密钥）
         headers = {'Content-Type': 'application/json'}
         
-        if config.ALERT_WEBHOOK_SECRET:
-            signature = hmac.new(
-                config.ALERT_WEBHOOK_SECRET.encode(),
-                json.dumps(payload).encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            headers['X-Signature'] = f"sha256={signature}"
+        if self._hmac_template is not None:
+            signer = self._hmac_template.copy()
+            signer.update(payload_bytes)
+            headers['X-Signature'] = f"sha256={signer.hexdigest()}"
         
-        # 发送请求
-        response = requests.post(webhook_url, json=payload, headers=headers, timeout=10)
-        response.raise_for_status()
+        # 发送请求（复用连接池）
+        async with self._get_http().post(webhook_url, data=payload_bytes, headers=headers) as response:
+            response.raise_for_status()
     
     async def _send_sms_notification(self, event: AlertEvent) -> None:
         """发送短信通知"""
-        targets = self.repo.get_alert_targets(event.alert_id)
+        targets = await self._repo("get_alert_targets", event.alert_id)
         phone_number = targets.get('sms')
         
         if not phone_number:
@@ -571,7 +637,8 @@ class IntelligentAlertSystem:
     async def _send_app_notification(self, event: AlertEvent) -> None:
         """发送应用内通知"""
         # 记录应用内消息
-        self.repo.insert_app_notification(
+        await self._repo(
+            "insert_app_notification",
             user_id=event.user_id,
             title=f"价格告警 - {event.rule_type}",
             message=event.message,
@@ -585,7 +652,8 @@ class IntelligentAlertSystem:
     
     async def _update_alert_status(self, rule: AlertRule, price: float, currency: str) -> None:
         """更新告警状态"""
-        self.repo.update_alert_last_triggered(rule.id, price, currency)
+        await self._repo("update_alert_last_triggered", rule.id, price, currency)
+        rule._cooldown_deadline = time.monotonic() + rule.cooldown_minutes * 60
         
         # 清除缓存
         self._clear_alert_cache(rule.product_id)
@@ -607,7 +675,107 @@ class IntelligentAlertSystem:
             'sent_at': datetime.utcnow() if sent_channels else None
         }
         
-        self.repo.insert_alert_event(event_data)
+        event_queue = await self._get_event_queue()
+        await event_queue.put(event_data)
+    
+    async def _get_event_queue(self) -> asyncio.Queue:
+        """获取绑定当前事件循环的告警事件队列，并确保后台刷新任务在运行"""
+        loop = asyncio.get_running_loop()
+        if self._flush_task is not None and self._flush_task.get_loop() is not loop:
+            # 原事件循环已不可用，先直接写入其队列中剩余的事件
+            await self._write_orphaned_events()
+        
+        if self._event_queue is None:
+            self._event_queue = asyncio.Queue(maxsize=10_000)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_events(self._event_queue))
+        return self._event_queue
+    
+    async def _write_orphaned_events(self) -> None:
+        """直接写入刷新任务已无法处理的队列（原事件循环已不可用或刷新任务已退出）中剩余的告警事件"""
+        event_queue = self._event_queue
+        self._flush_task = None
+        self._event_queue = None
+        if event_queue is None:
+            return
+        
+        batch = []
+        while True:
+            try:
+                event_data = event_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if event_data is not None:
+                batch.append(event_data)
+        
+        if batch:
+            try:
+                await self._repo("insert_alert_events_bulk", batch)
+            except Exception:
+                logger.exception("写入旧事件循环中剩余的告警事件失败")
+    
+    async def _flush_events(self, event_queue: asyncio.Queue) -> None:
+        """后台批量写入告警事件，收到 None 时写完当前批次后退出"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            event_data = await event_queue.get()
+            if event_data is None:
+                return
+            
+            batch = [event_data]
+            deadline = loop.time() + self.event_flush_interval
+            try:
+                while len(batch) < self.event_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event_data = await asyncio.wait_for(event_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if event_data is None:
+                        stopping = True
+                        break
+                    batch.append(event_data)
+            except asyncio.CancelledError:
+                # 事件循环关闭时被取消：已取出的事件放回队列，之后由 _write_orphaned_events 写入
+                for event_data in batch:
+                    event_queue.put_nowait(event_data)
+                raise
+            
+            try:
+                await self._repo("insert_alert_events_bulk", batch)
+            except Exception:
+                logger.exception("批量写入告警事件失败")
+    
+    async def _repo(self, method: str, *args, **kwargs) -> Any:
+        """在线程池中执行同步的数据库调用，避免阻塞事件循环"""
+        return await asyncio.to_thread(getattr(self.repo, method), *args, **kwargs)
+    
+    async def _get_smtp(self) -> aiosmtplib.SMTP:
+        """获取持久SMTP连接（懒加载，断线后重建）"""
+        if self._smtp is None or not self._smtp.is_connected:
+            # 465 端口直接使用 SMTPS，省去 STARTTLS 升级的往返
+            use_tls = config.SMTP_PORT == 465
+            smtp = aiosmtplib.SMTP(hostname=config.SMTP_HOST, port=config.SMTP_PORT,
+                                   use_tls=use_tls, start_tls=False)
+            await smtp.connect()
+            if not use_tls:
+                await smtp.starttls()
+            await smtp.login(config.SMTP_USER, config.SMTP_PASS)
+            self._smtp = smtp
+        return self._smtp
+    
+    def _get_http(self) -> aiohttp.ClientSession:
+        """获取共享HTTP会话（懒加载）"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=10),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._http
     
     def _clear_alert_cache(self, product_id: int) -> None:
         """清除告警缓存"""
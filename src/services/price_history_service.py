@@ -3,19 +3,80 @@
 实现完整的价格历史管理、趋势分析和数据统计
 """
 import json
+import math
+import queue
 import statistics
+import threading
+import time
+import warnings
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import OrderedDict
 
 import numpy as np
-import pandas as pd
-from scipy import stats
 
 from ..config.config import config
 from ..dao.supabase_repo import SupabaseRepo
 
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖（speedups），缺失时使用纯 NumPy 实现
+    njit = None
+
+# 告警规则类型编码（用于向量化判断）
+ALERT_RULE_CODES = {'price_below': 0, 'price_above': 1, 'price_change': 2}
+
+# 价格分布区间名称（由低到高）
+PRICE_DISTRIBUTION_LABELS = ('very_low', 'low', 'medium', 'high', 'very_high')
+
+# 价格点不超过该数量时，价格分布用纯 Python 计算（避免 NumPy 调用开销）
+_SMALL_DISTRIBUTION_SIZE = 64
+
+# 标准差相对均值低于该比例时视为0（滑动更新会残留极小的舍入误差）
+_STD_RELATIVE_EPS = 1e-9
+
+
+def _rolling_mean_std_numpy(prices: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """计算每个长度为 window 的滑动窗口的均值和样本标准差（纯 NumPy 实现）"""
+    windows = np.lib.stride_tricks.sliding_window_view(prices, window)
+    return windows.mean(axis=1), windows.std(axis=1, ddof=1)
+
+
+def _rolling_mean_std_welford(prices: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """计算每个长度为 window 的滑动窗口的均值和样本标准差（Welford 增量更新，每个窗口 O(1)）"""
+    n = prices.shape[0] - window + 1
+    means = np.empty(n, dtype=np.float64)
+    stds = np.empty(n, dtype=np.float64)
+    
+    mean = 0.0
+    m2 = 0.0
+    for k in range(window):
+        delta = prices[k] - mean
+        mean += delta / (k + 1)
+        m2 += delta * (prices[k] - mean)
+    
+    for i in range(n):
+        if i > 0:
+            # 移出 prices[i - 1]，移入 prices[i + window - 1]
+            old = prices[i - 1]
+            new = prices[i + window - 1]
+            old_mean = mean
+            mean += (new - old) / window
+            m2 += (new - old) * (new - mean + old - old_mean)
+        means[i] = mean
+        var = m2 / (window - 1)
+        stds[i] = np.sqrt(var) if var > 0 else 0.0
+    
+    return means, stds
+
+
+if njit is not None:
+    _rolling_mean_std = njit(cache=True, fastmath=True)(_rolling_mean_std_welford)
+else:
+    _rolling_mean_std = _rolling_mean_std_numpy
+
 
 @dataclass
 class PricePoint:
@@ -57,11 +118,94 @@ class PriceAlert:
     status: str
 
 
+@dataclass(slots=True)
+class AlertTable:
+    """商品告警规则的列式表示，用于一次性向量化判断所有规则"""
+    alerts: List[Dict[str, Any]]
+    rule_codes: np.ndarray  # int8，取值见 ALERT_RULE_CODES，其他类型为 -1
+    thresholds: np.ndarray  # float64，未设置（或为0）时为 NaN
+    percents: np.ndarray  # float64，取绝对值，未设置（或为0）时为 NaN
+    
+    @classmethod
+    def from_alerts(cls, alerts: List[Dict[str, Any]]) -> 'AlertTable':
+        """由告警规则列表构建列式表"""
+        return cls(
+            alerts=alerts,
+            rule_codes=np.fromiter((ALERT_RULE_CODES.get(a.get('rule_type'), -1) for a in alerts),
+                                   dtype=np.int8, count=len(alerts)),
+            thresholds=np.fromiter((a.get('threshold') or np.nan for a in alerts),
+                                   dtype=np.float64, count=len(alerts)),
+            percents=np.abs(np.fromiter((a.get('percent') or np.nan for a in alerts),
+                                        dtype=np.float64, count=len(alerts)))
+        )
+
+
+@dataclass(slots=True)
+class PriceSeries:
+    """按时间排序的价格序列（列式存储，供趋势、统计、异常检测直接使用数组）"""
+    timestamps: np.ndarray  # datetime64[ns]，UTC
+    prices: np.ndarray  # float64
+    rows: List[Dict[str, Any]]
+    
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> 'PriceSeries':
+        """由数据库价格记录构建价格序列（一次性解析时间并排序）"""
+        with warnings.catch_warnings():
+            # 带时区偏移的时间会被换算为UTC，numpy 对此发出的警告可以忽略
+            warnings.simplefilter('ignore', UserWarning)
+            timestamps = np.array([r['created_at'] for r in rows], dtype='datetime64[ns]')
+        prices = np.fromiter((float(r['price']) for r in rows), dtype=np.float64, count=len(rows))
+        order = np.argsort(timestamps, kind='stable')
+        return cls(
+            timestamps=timestamps[order],
+            prices=prices[order],
+            rows=[rows[i] for i in order]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def to_points(self) -> List[PricePoint]:
+        """转换为价格点列表（时间保持数据库返回的原始值）"""
+        return [
+            PricePoint(
+                timestamp=row['created_at'],
+                price=price,
+                currency=row['currency'],
+                source=row.get('source'),
+                metadata=row.get('metadata')
+            )
+            for row, price in zip(self.rows, self.prices.tolist())
+        ]
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """将数据库返回的时间（ISO字符串或datetime）转换为datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+
 class PriceHistoryService:
     """价格历史记录服务"""
     
     def __init__(self):
         self.repo = SupabaseRepo()
+        
+        # 告警检查在后台线程中执行，不阻塞价格写入
+        self._alert_queue: queue.Queue = queue.Queue()
+        self._alert_worker: Optional[threading.Thread] = None
+        self._alert_worker_lock = threading.Lock()
+        
+        # 告警规则缓存（减少数据库查询），告警规则的增删改最多在 cache_ttl 秒后生效
+        self.alert_cache: Dict[int, AlertTable] = {}
+        self.last_cache_update: Dict[int, float] = {}
+        self.cache_ttl = 60  # 秒
+        
+        # 每个商品最近一次记录的价格和时间（LRU，有上限），供重复价格判断和变化率告警使用
+        self._last_seen: OrderedDict[int, Tuple[float, datetime]] = OrderedDict()
+        self._last_seen_lock = threading.Lock()
+        self.last_seen_max = 50_000
     
     def record_price(self, product_id: int, price: float, currency: str, 
                     source: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> bool:
@@ -96,8 +240,9 @@ class PriceHistoryService:
             # 更新商品最后更新时间
             self.repo.update_product_last_updated(product_id)
             
-            # 检查是否触发告警
-            self._check_alerts(product_id, price, currency)
+            # 检查是否触发告警（后台执行）
+            last_price = self._remember_price(product_id, price)
+            self._enqueue_alert_check(product_id, price, currency, last_price)
             
             return True
             
@@ -105,6 +250,42 @@ class PriceHistoryService:
             print(f"记录价格失败: {e}")
             return False
     
+    def record_prices_bulk(self, points: List[Tuple[int, float, str, Optional[str], Optional[Dict[str, Any]]]]) -> bool:
+        """
+        批量记录价格数据（一次插入价格，一次更新商品时间），告警检查在后台执行
+        
+        Args:
+            points: (商品ID, 价格, 货币代码, 数据来源, 额外元数据) 列表
+            
+        Returns:
+            是否记录成功
+        """
+        if not points:
+            return True
+        
+        try:
+            rows = []
+            for product_id, price, currency, source, metadata in points:
+                row: Dict[str, Any] = {'product_id': product_id, 'price': price, 'currency': currency}
+                if source is not None:
+                    row['source'] = source
+                if metadata is not None:
+                    row['metadata'] = metadata
+                rows.append(row)
+            
+            self.repo.insert_prices(rows)
+            self.repo.update_products_last_updated(list({p[0] for p in points}))
+            
+            for product_id, price, currency, _, _ in points:
+                last_price = self._remember_price(product_id, price)
+                self._enqueue_alert_check(product_id, price, currency, last_price)
+            
+            return True
+            
+        except Exception as e:
+            print(f"批量记录价格失败: {e}")
+            return False
+    
     def get_price_history(self, product_id: int, days: int = 30, 
                          granularity: str = 'daily') -> List[PricePoint]:
         """
@@ -118,6 +299,21 @@ class PriceHistoryService:
         Returns:
             价格点列表
         """
+        return self.get_price_series(product_id, days, granularity).to_points()
+    
+    def get_price_series(self, product_id: int, days: int = 30,
+                         granularity: str = 'daily') -> PriceSeries:
+        """
+        获取价格历史数据（列式）
+        
+        Args:
+            product_id: 商品ID
+            days: 查询天数
+            granularity: 数据粒度 ('hourly', 'daily', 'weekly')
+            
+        Returns:
+            按时间排序的价格序列
+        """
         try:
             start_date = datetime.utcnow() - timedelta(days=days)
             
@@ -130,21 +326,11 @@ class PriceHistoryService:
             else:
                 prices = self.repo.get_price_history(product_id, start_date)
             
-            price_points = []
-            for price_record in prices:
-                price_points.append(PricePoint(
-                    timestamp=price_record['created_at'],
-                    price=float(price_record['price']),
-                    currency=price_record['currency'],
-                    source=price_record.get('source'),
-                    metadata=price_record.get('metadata')
-                ))
-            
-            return sorted(price_points, key=lambda x: x.timestamp)
+            return PriceSeries.from_rows(prices)
             
         except Exception as e:
             print(f"获取价格历史失败: {e}")
-            return []
+            return PriceSeries.from_rows([])
     
     def analyze_price_trend(self, product_id: int, days: int = 30) -> Optional[PriceTrend]:
         """
@@ -158,57 +344,84 @@ class PriceHistoryService:
             价格趋势数据
         """
         try:
-            price_history = self.get_price_history(product_id, days, 'daily')
+            # 优先使用数据库端聚合，只返回一行统计结果
+            start_date = datetime.utcnow() - timedelta(days=days)
+            aggregate = self.repo.get_trend_aggregate(product_id, start_date.isoformat(), 'day')
+            if aggregate is not None:
+                if (aggregate.get('count') or 0) < 2:
+                    return None
+                return self._build_price_trend(
+                    start_price=float(aggregate['first_price']),
+                    end_price=float(aggregate['last_price']),
+                    highest_price=float(aggregate['max_price']),
+                    lowest_price=float(aggregate['min_price']),
+                    average_price=float(aggregate['avg_price']),
+                    volatility=float(aggregate.get('stddev_price') or 0),
+                    data_points=int(aggregate['count']),
+                    period_days=(_parse_timestamp(aggregate['last_at']) - _parse_timestamp(aggregate['first_at'])).days
+                )
+            
+            # 数据库未部署聚合函数时，下载价格历史在本地计算
+            price_history = self.get_price_series(product_id, days, 'daily')
             
             if len(price_history) < 2:
                 return None
             
-            prices = [p.price for p in price_history]
-            timestamps = [p.timestamp for p in price_history]
-            
-            # 计算基本统计量
-            start_price = prices[0]
-            end_price = prices[-1]
-            change_amount = end_price - start_price
-            change_percent = (change_amount / start_price) * 100 if start_price > 0 else 0
-            
-            highest_price = max(prices)
-            lowest_price = min(prices)
-            average_price = statistics.mean(prices)
-            
-            # 计算波动率（标准差）
-            volatility = statistics.stdev(prices) if len(prices) > 1 else 0
-            
-            # 判断趋势方向
-            if change_percent > 2:
-                trend_direction = 'up'
-            elif change_percent < -2:
-                trend_direction = 'down'
-            else:
-                trend_direction = 'stable'
-            
-            # 计算数据点数量和周期天数
-            data_points = len(prices)
-            period_days = (timestamps[-1] - timestamps[0]).days
-            
-            return PriceTrend(
-                start_price=start_price,
-                end_price=end_price,
-                change_amount=change_amount,
-                change_percent=change_percent,
-                highest_price=highest_price,
-                lowest_price=lowest_price,
-                average_price=average_price,
-                volatility=volatility,
-                trend_direction=trend_direction,
-                data_points=data_points,
-                period_days=period_days
-            )
+            prices, timestamps = price_history.prices, price_history.timestamps
+            return self._trend_from_array(prices, timestamps)
             
         except Exception as e:
             print(f"分析价格趋势失败: {e}")
             return None
     
+    def _trend_from_array(self, prices: np.ndarray, timestamps: np.ndarray) -> Optional[PriceTrend]:
+        """基于价格数组计算价格趋势"""
+        if len(prices) < 2:
+            return None
+        
+        values = prices.tolist()
+        average_price = statistics.fmean(values)
+        return self._build_price_trend(
+            start_price=values[0],
+            end_price=values[-1],
+            highest_price=max(values),
+            lowest_price=min(values),
+            average_price=average_price,
+            # 计算波动率（标准差，复用已算出的均值）
+            volatility=statistics.stdev(values, xbar=average_price),
+            data_points=len(values),
+            period_days=int((timestamps[-1] - timestamps[0]) // np.timedelta64(1, 'D'))
+        )
+    
+    def _build_price_trend(self, start_price: float, end_price: float, highest_price: float,
+                           lowest_price: float, average_price: float, volatility: float,
+                           data_points: int, period_days: int) -> PriceTrend:
+        """根据统计量构建价格趋势（计算涨跌幅并判断趋势方向）"""
+        change_amount = end_price - start_price
+        change_percent = (change_amount / start_price) * 100 if start_price > 0 else 0
+        
+        # 判断趋势方向
+        if change_percent > 2:
+            trend_direction = 'up'
+        elif change_percent < -2:
+            trend_direction = 'down'
+        else:
+            trend_direction = 'stable'
+        
+        return PriceTrend(
+            start_price=start_price,
+            end_price=end_price,
+            change_amount=change_amount,
+            change_percent=change_percent,
+            highest_price=highest_price,
+            lowest_price=lowest_price,
+            average_price=average_price,
+            volatility=volatility,
+            trend_direction=trend_direction,
+            data_points=data_points,
+            period_days=period_days
+        )
+    
     def get_price_statistics(self, product_id: int, days: int = 30) -> Dict[str, Any]:
         """
         获取价格统计信息
@@ -221,46 +434,58 @@ class PriceHistoryService:
             统计信息字典
         """
         try:
-            price_history = self.get_price_history(product_id, days, 'daily')
+            price_history = self.get_price_series(product_id, days, 'daily')
             
             if not price_history:
                 return {}
             
-            prices = [p.price for p in price_history]
-            
-            # 基础统计
-            stats_data = {
-                'count': len(prices),
-                'min': min(prices),
-                'max': max(prices),
-                'mean': statistics.mean(prices),
-                'median': statistics.median(prices),
-                'std': statistics.stdev(prices) if len(prices) > 1 else 0,
-                'variance': statistics.variance(prices) if len(prices) > 1 else 0
-            }
-            
-            # 分位数
-            if len(prices) > 1:
-                prices_sorted = sorted(prices)
-                n = len(prices_sorted)
-                stats_data['q1'] = prices_sorted[n // 4]
-                stats_data['q3'] = prices_sorted[3 * n // 4]
-                stats_data['iqr'] = stats_data['q3'] - stats_data['q1']
-            
-            # 价格分布
-            price_ranges = self._calculate_price_distribution(prices)
-            stats_data['distribution'] = price_ranges
-            
-            # 价格变化频率
-            price_changes = self._calculate_price_changes(prices)
-            stats_data['changes'] = price_changes
-            
-            return stats_data
+            prices = price_history.prices
+            return self._statistics_from_array(prices)
             
         except Exception as e:
             print(f"获取价格统计失败: {e}")
             return {}
     
+    def _statistics_from_array(self, prices: np.ndarray) -> Dict[str, Any]:
+        """基于价格数组计算统计信息"""
+        if len(prices) == 0:
+            return {}
+        
+        values = prices.tolist()
+        mean = statistics.fmean(values)
+        # 方差只计算一次（复用已算出的均值），标准差由方差开方得到
+        variance = statistics.variance(values, xbar=mean) if len(values) > 1 else 0
+        
+        # 基础统计
+        stats_data = {
+            'count': len(values),
+            'min': min(values),
+            'max': max(values),
+            'mean': mean,
+            'median': statistics.median(values),
+            'std': math.sqrt(variance),
+            'variance': variance
+        }
+        
+        # 分位数
+        if len(values) > 1:
+            n = len(prices)
+            k1, k3 = n // 4, 3 * n // 4
+            partitioned = np.partition(prices, [k1, k3])
+            stats_data['q1'] = float(partitioned[k1])
+            stats_data['q3'] = float(partitioned[k3])
+            stats_data['iqr'] = stats_data['q3'] - stats_data['q1']
+        
+        # 价格分布
+        price_ranges = self._calculate_price_distribution(prices)
+        stats_data['distribution'] = price_ranges
+        
+        # 价格变化频率
+        price_changes = self._calculate_price_changes(prices)
+        stats_data['changes'] = price_changes
+        
+        return stats_data
+    
     def detect_price_anomalies(self, product_id: int, days: int = 30, 
                               threshold: float = 2.0) -> List[Dict[str, Any]]:
         """
@@ -275,40 +500,155 @@ class PriceHistoryService:
             异常价格列表
         """
         try:
-            price_history = self.get_price_history(product_id, days, 'daily')
+            price_history = self.get_price_series(product_id, days, 'daily')
             
             if len(price_history) < 10:  # 需要足够的数据点
                 return []
             
-            prices = [p.price for p in price_history]
-            timestamps = [p.timestamp for p in price_history]
+            prices, timestamps = price_history.prices, price_history.timestamps
+            return self._anomalies_from_array(prices, timestamps, threshold)
             
-            # 计算移动平均和标准差
-            window_size = 7
-            anomalies = []
+        except Exception as e:
+            print(f"检测价格异常失败: {e}")
+            return []
+    
+    def _anomalies_from_array(self, prices: np.ndarray, timestamps: np.ndarray,
+                              threshold: float) -> List[Dict[str, Any]]:
+        """基于价格数组检测价格异常"""
+        if len(prices) < 10:  # 需要足够的数据点
+            return []
+        
+        # 计算移动平均和标准差（第 i 个点对应窗口 prices[i - window_size:i + window_size]）
+        window_size = 7
+        centers = prices[window_size:len(prices) - window_size]
+        if centers.size == 0:
+            return []
+        
+        means, stds = _rolling_mean_std(np.ascontiguousarray(prices), 2 * window_size)
+        means = means[:centers.size]
+        stds = stds[:centers.size]
+        
+        # 检测是否为异常值（标准差为0的窗口不参与判断）
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(stds > _STD_RELATIVE_EPS * np.abs(means),
+                                np.abs((centers - means) / stds), 0.0)
+        
+        anomalies = []
+        for j in np.nonzero(z_scores > threshold)[0]:
+            price = float(centers[j])
+            mean = float(means[j])
+            anomalies.append({
+                'timestamp': timestamps[j + window_size].astype('datetime64[us]').item(),
+                'price': price,
+                'expected_price': mean,
+                'z_score': float(z_scores[j]),
+                'type': 'high' if price > mean else 'low'
+            })
+        
+        return anomalies
+    
+    def detect_price_anomalies_batch(self, product_ids: List[int], days: int = 30,
+                                     window_size: int = 7,
+                                     threshold: Optional[float] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        批量检测多个商品的价格异常（所有商品共用一个 IsolationForest 模型）
+        
+        每个商品的价格先按中位数/四分位距缩放，使不同价位的商品可以放在一起训练，
+        再以长度为 window_size 的滑动窗口作为样本，窗口得分归属于窗口内最新的价格点。
+        需要安装 scikit-learn（可选依赖 ml：pip install "spider[ml]"）。
+        
+        Args:
+            product_ids: 商品ID列表
+            days: 检测天数
+            window_size: 滑动窗口长度
+            threshold: 异常得分阈值（score_samples 低于该值视为异常），默认使用模型的 offset_
+            
+        Returns:
+            商品ID到异常价格列表的映射
+            
+        Raises:
+            ImportError: 未安装 scikit-learn
+        """
+        try:
+            from sklearn.ensemble import IsolationForest
+            from sklearn.preprocessing import RobustScaler
+        except ImportError as e:
+            raise ImportError('批量检测价格异常需要安装 scikit-learn（pip install "spider[ml]"）') from e
+        
+        try:
+            samples = []
+            owners = []  # (商品ID, 价格序列)，与 samples 一一对应
+            for product_id in product_ids:
+                price_history = self.get_price_series(product_id, days, 'daily')
+                if len(price_history) < 10:  # 需要足够的数据点
+                    continue
+                
+                scaled = RobustScaler().fit_transform(price_history.prices.reshape(-1, 1)).ravel()
+                samples.append(np.lib.stride_tricks.sliding_window_view(scaled, window_size))
+                owners.append((product_id, price_history))
+            
+            if not samples:
+                return {}
             
-            for i in range(window_size, len(prices) - window_size):
-                window = prices[i - window_size:i + window_size]
-                mean = statistics.mean(window)
-                std = statistics.stdev(window) if len(window) > 1 else 0
+            X = np.concatenate(samples)
+            clf = IsolationForest(n_estimators=100, contamination='auto', n_jobs=-1)
+            clf.fit(X)
+            scores = clf.score_samples(X)
+            if threshold is None:
+                threshold = clf.offset_
+            
+            anomalies: Dict[int, List[Dict[str, Any]]] = {}
+            start = 0
+            for (product_id, price_history), windows in zip(owners, samples):
+                product_scores = scores[start:start + len(windows)]
+                start += len(windows)
                 
-                # 检测是否为异常值
-                if std > 0:
-                    z_score = abs((prices[i] - mean) / std)
-                    if z_score > threshold:
-                        anomalies.append({
-                            'timestamp': timestamps[i],
-                            'price': prices[i],
-                            'expected_price': mean,
-                            'z_score': z_score,
-                            'type': 'high' if prices[i] > mean else 'low'
-                        })
+                product_anomalies = []
+                next_window = 0
+                for j in np.nonzero(product_scores < threshold)[0]:
+                    # 同一个异常点会让包含它的 window_size 个窗口都异常，只报告引入它的首个窗口
+                    if j < next_window:
+                        continue
+                    next_window = j + window_size
+                    i = j + window_size - 1
+                    product_anomalies.append({
+                        'timestamp': price_history.timestamps[i].astype('datetime64[us]').item(),
+                        'price': float(price_history.prices[i]),
+                        'score': float(product_scores[j])
+                    })
+                anomalies[product_id] = product_anomalies
             
             return anomalies
             
         except Exception as e:
-            print(f"检测价格异常失败: {e}")
-            return []
+            print(f"批量检测价格异常失败: {e}")
+            return {}
+    
+    def summarize(self, product_id: int, days: int = 30, anomaly_threshold: float = 2.0) -> Dict[str, Any]:
+        """
+        汇总价格趋势、统计信息和异常（只查询一次价格历史）
+        
+        Args:
+            product_id: 商品ID
+            days: 统计天数
+            anomaly_threshold: 异常阈值（标准差倍数）
+            
+        Returns:
+            包含 trend、statistics、anomalies 的字典
+        """
+        try:
+            price_history = self.get_price_series(product_id, days, 'daily')
+            prices, timestamps = price_history.prices, price_history.timestamps
+            
+            return {
+                'trend': self._trend_from_array(prices, timestamps),
+                'statistics': self._statistics_from_array(prices),
+                'anomalies': self._anomalies_from_array(prices, timestamps, anomaly_threshold)
+            }
+            
+        except Exception as e:
+            print(f"汇总价格数据失败: {e}")
+            return {'trend': None, 'statistics': {}, 'anomalies': []}
     
     def predict_price(self, product_id: int, days: int = 7) -> Dict[str, Any]:
         """
@@ -322,36 +662,40 @@ class PriceHistoryService:
             预测结果
         """
         try:
-            price_history = self.get_price_history(product_id, 90, 'daily')  # 使用90天数据
+            price_history = self.get_price_series(product_id, 90, 'daily')  # 使用90天数据
             
             if len(price_history) < 30:
                 return {'error': '数据不足，无法进行预测'}
             
-            prices = [p.price for p in price_history]
+            n = len(price_history)
+            y = price_history.prices
+            x = np.arange(n, dtype=np.float64)
             
-            # 简单的线性回归预测
-            x = np.arange(len(prices))
-            y = np.array(prices)
-            
-            # 拟合线性模型
-            slope, intercept = np.polyfit(x, y, 1)
+            # 简单的线性回归预测（x = 0..n-1，Σx 与 Σx² 有闭式解）
+            sx = n * (n - 1) / 2
+            sxx = (n - 1) * n * (2 * n - 1) / 6
+            sy = y.sum()
+            sxy = np.dot(x, y)
+            slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+            intercept = (sy - slope * sx) / n
             
             # 预测未来价格
-            future_x = np.arange(len(prices), len(prices) + days)
-            predicted_prices = slope * future_x + intercept
+            predicted_prices = slope * np.arange(n, n + days) + intercept
             
-            # 计算置信区间
+            # 计算置信区间（回归标准误，自由度 n-2）
             residuals = y - (slope * x + intercept)
-            std_error = np.std(residuals)
-            
-            predictions = []
-            for i, price in enumerate(predicted_prices):
-                predictions.append({
-                    'day': i + 1,
-                    'predicted_price': float(price),
-                    'lower_bound': float(price - 1.96 * std_error),
-                    'upper_bound': float(price + 1.96 * std_error)
-                })
+            std_error = residuals.std(ddof=2)
+            margin = float(1.96 * std_error)
+            
+            predictions = [
+                {
+                    'day': day,
+                    'predicted_price': price,
+                    'lower_bound': price - margin,
+                    'upper_bound': price + margin
+                }
+                for day, price in enumerate(predicted_prices.tolist(), start=1)
+            ]
             
             return {
                 'trend_slope': float(slope),
@@ -374,6 +718,14 @@ class PriceHistoryService:
         Returns:
             是否跳过
         """
+        # 优先使用本进程记录的最近价格
+        with self._last_seen_lock:
+            last_seen = self._last_seen.get(product_id)
+        if last_seen is not None:
+            last_price, last_timestamp = last_seen
+            return (abs(last_price - price) < 0.01
+                    and (datetime.utcnow() - last_timestamp).total_seconds() < 600)
+        
         try:
             # 获取最近的价格记录
             recent_prices = self.repo.get_price_history(product_id, limit=5)
@@ -396,7 +748,83 @@ class PriceHistoryService:
         except Exception:
             return False
     
-    def _check_alerts(self, product_id: int, price: float, currency: str) -> None:
+    def _remember_price(self, product_id: int, price: float) -> Optional[float]:
+        """
+        记录商品最近一次写入的价格
+        
+        Args:
+            product_id: 商品ID
+            price: 价格
+            
+        Returns:
+            此前记录的价格（未知时为None）
+        """
+        with self._last_seen_lock:
+            previous = self._last_seen.get(product_id)
+            self._last_seen[product_id] = (price, datetime.utcnow())
+            self._last_seen.move_to_end(product_id)
+            if len(self._last_seen) > self.last_seen_max:
+                self._last_seen.popitem(last=False)
+        
+        return previous[0] if previous else None
+    
+    def _get_product_alerts_cached(self, product_id: int) -> AlertTable:
+        """获取商品的告警规则（带缓存，已转换为列式表）"""
+        current_time = time.monotonic()
+        cached_at = self.last_cache_update.get(product_id)
+        if cached_at is not None and current_time - cached_at < self.cache_ttl:
+            return self.alert_cache[product_id]
+        
+        table = AlertTable.from_alerts(self.repo.get_product_alerts(product_id))
+        self.alert_cache[product_id] = table
+        self.last_cache_update[product_id] = current_time
+        return table
+    
+    def _enqueue_alert_check(self, product_id: int, price: float, currency: str,
+                             last_price: Optional[float] = None) -> None:
+        """将告警检查放入后台队列（按需启动工作线程）"""
+        if self._alert_worker is None or not self._alert_worker.is_alive():
+            with self._alert_worker_lock:
+                if self._alert_worker is None or not self._alert_worker.is_alive():
+                    self._alert_worker = threading.Thread(
+                        target=self._alert_worker_loop, name="price-alert-checker", daemon=True
+                    )
+                    self._alert_worker.start()
+        
+        self._alert_queue.put((product_id, price, currency, last_price))
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        完成已排队的告警检查并停止后台告警线程
+        
+        Args:
+            timeout: 等待告警线程结束的最长秒数（None 表示一直等待）
+        """
+        with self._alert_worker_lock:
+            worker = self._alert_worker
+            self._alert_worker = None
+        if worker is None or not worker.is_alive():
+            return
+        
+        # 哨兵排在已入队的检查之后，告警线程处理完它们再退出
+        self._alert_queue.put(None)
+        worker.join(timeout)
+        if worker.is_alive():
+            print(f"告警检查线程未在 {timeout} 秒内结束，剩余约 {self._alert_queue.qsize()} 个检查未执行")
+    
+    def _alert_worker_loop(self) -> None:
+        """后台告警检查线程，收到 None 时退出"""
+        while True:
+            item = self._alert_queue.get()
+            try:
+                if item is None:
+                    return
+                self._check_alerts(*item)
+            finally:
+                self._alert_queue.task_done()
+    
+    def _check_alerts(self, product_id: int, price: float, currency: str,
+                      last_price: Optional[float] = None) -> None:
         """
         检查并触发告警
         
@@ -404,67 +832,69 @@ class PriceHistoryService:
             product_id: 商品ID
             price: 当前价格
             currency: 货币代码
+            last_price: 上一次记录的价格（未知时为None）
         """
         try:
             # 获取该商品的所有活跃告警
-            alerts = self.repo.get_product_alerts(product_id)
-            
-            for alert in alerts:
-                if self._should_trigger_alert(alert, price):
-                    # 更新告警最后触发时间
-                    self.repo.update_alert_last_triggered(alert['id'])
-                    
-                    # 记录告警事件
-                    self.repo.insert_alert_event(
-                        alert_id=alert['id'],
-                        product_id=product_id,
-                        user_id=alert['user_id'],
-                        price=price,
-                        currency=currency,
-                        message=f"价格触发告警: {price} {currency}"
-                    )
-                    
-                    print(f"触发告警: {alert['id']} - 商品 {product_id} 价格 {price}")
+            table = self._get_product_alerts_cached(product_id)
+            
+            for alert in self._match_alerts(table, product_id, price, last_price):
+                # 更新告警最后触发时间
+                self.repo.update_alert_last_triggered(alert['id'])
+                
+                # 记录告警事件
+                self.repo.insert_alert_event(
+                    alert_id=alert['id'],
+                    product_id=product_id,
+                    user_id=alert['user_id'],
+                    price=price,
+                    currency=currency,
+                    message=f"价格触发告警: {price} {currency}"
+                )
+                
+                print(f"触发告警: {alert['id']} - 商品 {product_id} 价格 {price}")
         
         except Exception as e:
             print(f"检查告警失败: {e}")
     
-    def _should_trigger_alert(self, alert: Dict[str, Any], price: float) -> bool:
+    def _match_alerts(self, table: AlertTable, product_id: int, price: float,
+                      last_price: Optional[float] = None) -> List[Dict[str, Any]]:
         """
-        判断是否应该触发告警
+        一次性判断商品的所有告警规则
         
         Args:
-            alert: 告警规则
+            table: 告警规则列式表
+            product_id: 商品ID
             price: 当前价格
+            last_price: 上一次记录的价格（未知时从价格历史中查询）
             
         Returns:
-            是否触发
+            应触发的告警规则列表
         """
-        rule_type = alert.get('rule_type', '')
-        
-        if rule_type == 'price_below':
-            threshold = alert.get('threshold')
-            if threshold and price <= threshold:
-                return True
+        if not table.alerts:
+            return []
         
-        elif rule_type == 'price_above':
-            threshold = alert.get('threshold')
-            if threshold and price >= threshold:
-                return True
+        rule_codes = table.rule_codes
+        change_rules = rule_codes == ALERT_RULE_CODES['price_change']
         
-        elif rule_type == 'price_change':
-            percent = alert.get('percent')
-            if percent:
+        change_percent = np.nan
+        if change_rules.any():
+            if last_price is None:
                 # 获取历史价格进行比较
-                price_history = self.get_price_history(alert['product_id'], 1, 'daily')
+                price_history = self.get_price_series(product_id, 1, 'daily')
                 if len(price_history) > 0:
-                    last_price = price_history[0].price
-                    if last_price > 0:
-                        change_percent = ((price - last_price) / last_price) * 100
-                        if abs(change_percent) >= abs(percent):
-                            return True
+                    last_price = float(price_history.prices[0])
+            if last_price is not None and last_price > 0:
+                change_percent = abs((price - last_price) / last_price) * 100
         
-        return False
+        # 未设置的阈值/百分比为 NaN，比较结果为 False
+        fire = (
+            ((rule_codes == ALERT_RULE_CODES['price_below']) & (price <= table.thresholds))
+            | ((rule_codes == ALERT_RULE_CODES['price_above']) & (price >= table.thresholds))
+            | (change_rules & (change_percent >= table.percents))
+        )
+        
+        return [table.alerts[i] for i in np.flatnonzero(fire)]
     
     def _calculate_price_distribution(self, prices: List[float]) -> Dict[str, int]:
         """
@@ -476,33 +906,38 @@ class PriceHistoryService:
         Returns:
             价格分布字典
         """
-        if not prices:
+        if len(prices) == 0:
             return {}
         
-        min_price = min(prices)
-        max_price = max(prices)
+        if len(prices) <= _SMALL_DISTRIBUTION_SIZE:
+            values = prices.tolist() if isinstance(prices, np.ndarray) else list(prices)
+            min_price = min(values)
+            max_price = max(values)
+        else:
+            arr = np.asarray(prices, dtype=np.float64)
+            min_price = arr.min()
+            max_price = arr.max()
         
         # 如果价格范围太小，不进行分组
         if max_price - min_price < 0.01:
             return {'single': len(prices)}
         
-        # 创建5个价格区间
+        # 创建5个价格区间（区间右闭，落在边界上的价格归入较低区间）
         range_size = (max_price - min_price) / 5
-        distribution = defaultdict(int)
-        
-        for price in prices:
-            if price <= min_price + range_size:
-                distribution['very_low'] += 1
-            elif price <= min_price + 2 * range_size:
-                distribution['low'] += 1
-            elif price <= min_price + 3 * range_size:
-                distribution['medium'] += 1
-            elif price <= min_price + 4 * range_size:
-                distribution['high'] += 1
-            else:
-                distribution['very_high'] += 1
+        if len(prices) <= _SMALL_DISTRIBUTION_SIZE:
+            edges = [min_price + range_size * k for k in range(1, 5)]
+            counts = [0] * 5
+            for price in values:
+                counts[bisect_left(edges, price)] += 1
+        else:
+            edges = min_price + range_size * np.arange(1, 5)
+            counts = np.bincount(np.searchsorted(edges, arr, side='left'), minlength=5)
         
-        return dict(distribution)
+        return {
+            label: int(count)
+            for label, count in zip(PRICE_DISTRIBUTION_LABELS, counts)
+            if count
+        }
     
     def _calculate_price_changes(self, prices: List[float]) -> Dict[str, Any]:
         """
@@ -517,30 +952,26 @@ class PriceHistoryService:
         if len(prices) < 2:
             return {}
         
-        changes = []
-        for i in range(1, len(prices)):
-            change = prices[i] - prices[i-1]
-            change_percent = (change / prices[i-1]) * 100 if prices[i-1] > 0 else 0
-            changes.append({
-                'absolute': change,
-                'percent': change_percent
-            })
+        arr = np.asarray(prices, dtype=np.float64)
+        changes = np.diff(arr)
+        previous = arr[:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change_percents = np.where(previous > 0, changes / previous * 100, 0.0)
         
         # 统计变化情况
-        positive_changes = [c for c in changes if c['absolute'] > 0]
-        negative_changes = [c for c in changes if c['absolute'] < 0]
-        stable_changes = [c for c in changes if abs(c['absolute']) < 0.01]
-        
-        avg_positive_change = statistics.mean([c['absolute'] for c in positive_changes]) if positive_changes else 0
-        avg_negative_change = statistics.mean([c['absolute'] for c in negative_changes]) if negative_changes else 0
+        positive_mask = changes > 0
+        negative_mask = changes < 0
+        stable_mask = np.abs(changes) < 0.01
+        positive_count = int(positive_mask.sum())
+        negative_count = int(negative_mask.sum())
         
         return {
-            'total_changes': len(changes),
-            'positive': len(positive_changes),
-            'negative': len(negative_changes),
-            'stable': len(stable_changes),
-            'avg_positive_change': avg_positive_change,
-            'avg_negative_change': avg_negative_change,
-            'largest_increase': max([c['percent'] for c in positive_changes]) if positive_changes else 0,
-            'largest_decrease': min([c['percent'] for c in negative_changes]) if negative_changes else 0
+            'total_changes': int(changes.size),
+            'positive': positive_count,
+            'negative': negative_count,
+            'stable': int(stable_mask.sum()),
+            'avg_positive_change': changes[positive_mask].mean().item() if positive_count else 0,
+            'avg_negative_change': changes[negative_mask].mean().item() if negative_count else 0,
+            'largest_increase': change_percents[positive_mask].max().item() if positive_count else 0,
+            'largest_decrease': change_percents[negative_mask].min().item() if negative_count else 0
         }
\ No newline at end of file
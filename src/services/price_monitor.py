@@ -5,12 +5,15 @@
 import os
 import time
 import smtplib
-import json
+import hmac
+import hashlib
+import threading
+import orjson
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 
 from ..config.config import config
 from ..dao.supabase_repo import SupabaseRepo
@@ -21,6 +24,26 @@ class PriceMonitor:
     
     def __init__(self):
         self.repo = SupabaseRepo()
+        
+        # 告警规则缓存（减少数据库查询），告警规则的增删改最多在 cache_ttl 秒后生效
+        self.alert_cache: Dict[int, List[Dict[str, Any]]] = {}
+        self.last_cache_update: Dict[int, float] = {}
+        self.cache_ttl = 60  # 秒
+    
+    def _get_product_alerts_cached(self, product_id: int) -> List[Dict[str, Any]]:
+        """获取商品的告警规则（带缓存）"""
+        current_time = time.monotonic()
+        cached_at = self.last_cache_update.get(product_id)
+        if cached_at is not None and current_time - cached_at < self.cache_ttl:
+            return self.alert_cache[product_id]
+        
+        alerts = self.repo.get_product_alerts(product_id)
+        for alert in alerts:
+            # 预先计算冷却截止时间（epoch秒），避免每次价格更新都解析时间字符串
+            alert['_cooldown_until'] = self._cooldown_until(alert)
+        self.alert_cache[product_id] = alerts
+        self.last_cache_update[product_id] = current_time
+        return alerts
     
     def check_price_changes(self, product_id: int, new_price: float, currency: str) -> List[Dict[str, Any]]:
         """
@@ -58,7 +81,7 @@ class PriceMonitor:
             print(f"商品 {product_id} 价格变化: {last_price} -> {new_price} ({price_change_percent:.2f}%)")
             
             # 获取该商品的所有告警规则
-            alerts = self.repo.get_product_alerts(product_id)
+            alerts = self._get_product_alerts_cached(product_id)
             
             for alert in alerts:
                 if self._should_trigger_alert(alert, new_price, last_price, price_change_percent):
@@ -82,8 +105,10 @@ class PriceMonitor:
                     
                     triggered_alerts.append(alert_data)
                     
-                    # 更新告警最后触发时间
+                    # 更新告警最后触发时间（同步更新缓存中的规则，保证冷却判断生效）
                     self.repo.update_alert_last_triggered(alert['id'])
+                    alert['last_triggered_at'] = datetime.utcnow()
+                    alert['_cooldown_until'] = time.time() + alert.get('cooldown_minutes', 60) * 60
         
         except Exception as e:
             print(f"检查价格变化失败: {e}")
@@ -144,11 +169,26 @@ class PriceMonitor:
         Returns:
             是否在冷却期内
         """
+        cooldown_until = alert.get('_cooldown_until')
+        if cooldown_until is None:
+            cooldown_until = alert['_cooldown_until'] = self._cooldown_until(alert)
+        return time.time() < cooldown_until
+    
+    def _cooldown_until(self, alert: Dict[str, Any]) -> float:
+        """
+        计算告警冷却截止时间
+        
+        Args:
+            alert: 告警规则
+        
+        Returns:
+            冷却截止时间（epoch秒），未触发过或时间无效时为0
+        """
         cooldown_minutes = alert.get('cooldown_minutes', 60)  # 默认60分钟
         last_triggered = alert.get('last_triggered_at')
         
         if not last_triggered:
-            return False
+            return 0.0
         
         try:
             if isinstance(last_triggered, str):
@@ -156,12 +196,15 @@ class PriceMonitor:
             else:
                 last_triggered_time = last_triggered
             
-            cooldown_end = last_triggered_time + timedelta(minutes=cooldown_minutes)
-            return datetime.utcnow() < cooldown_end.replace(tzinfo=None)
+            # 不带时区的时间按UTC处理
+            if last_triggered_time.tzinfo is None:
+                last_triggered_time = last_triggered_time.replace(tzinfo=timezone.utc)
+            
+            return last_triggered_time.timestamp() + cooldown_minutes * 60
         
         except Exception as e:
-            print(f"检查冷却时间失败: {e}")
-            return False
+            print(f"解析告警触发时间失败: {e}")
+            return 0.0
 
 
 class AlertSender:
@@ -169,6 +212,17 @@ class AlertSender:
     
     def __init__(self):
         self.repo = SupabaseRepo()
+        self._secret_key_bytes: Optional[bytes] = (
+            config.ALERT_WEBHOOK_SECRET.encode() if config.ALERT_WEBHOOK_SECRET else None
+        )
+        
+        # 持久SMTP连接（跨告警复用，避免每封邮件重新握手和登录）
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        self._mail_from = config.SMTP_FROM or config.SMTP_USER
+        
+        # 每个线程一个HTTP会话（懒加载，连接池跨告警复用，避免每次告警重新握手）
+        self._http_local = threading.local()
     
     def send_alert(self, alert_data: Dict[str, Any]) -> bool:
         """
@@ -293,23 +347,25 @@ Price Memory 价格监控系统
         
         try:
             # 创建邮件
-            msg = MimeMultipart('alternative')
+            msg = MIMEMultipart('alternative')
             msg['Subject'] = message['subject']
-            msg['From'] = config.SMTP_FROM or config.SMTP_USER
+            msg['From'] = self._mail_from
             msg['To'] = email
             
             # 添加文本和HTML内容
-            text_part = MimeText(message['content'], 'plain', 'utf-8')
-            html_part = MimeText(message['html_content'], 'html', 'utf-8')
+            text_part = MIMEText(message['content'], 'plain', 'utf-8')
+            html_part = MIMEText(message['html_content'], 'html', 'utf-8')
             
             msg.attach(text_part)
             msg.attach(html_part)
             
-            # 发送邮件
-            with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT) as server:
-                server.starttls()
-                server.login(config.SMTP_USER, config.SMTP_PASS)
-                server.send_message(msg)
+            # 发送邮件（连接被服务器关闭时重连后重试一次）
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg)
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._close_smtp()
+                    self._get_smtp().send_message(msg)
             
             print(f"邮件告警发送成功: {email}")
             return True
@@ -318,6 +374,39 @@ Price Memory 价格监控系统
             print(f"邮件发送失败: {e}")
             return False
     
+    def _get_smtp(self) -> smtplib.SMTP:
+        """获取持久SMTP连接（懒加载，调用方需持有 _smtp_lock）"""
+        if self._smtp is None:
+            # 465 端口直接使用 SMTPS，省去 STARTTLS 升级的往返
+            use_ssl = config.SMTP_PORT == 465
+            server_cls = smtplib.SMTP_SSL if use_ssl else smtplib.SMTP
+            server = server_cls(config.SMTP_HOST, config.SMTP_PORT, timeout=30)
+            try:
+                if not use_ssl:
+                    server.starttls()
+                server.login(config.SMTP_USER, config.SMTP_PASS)
+            except Exception:
+                server.close()
+                raise
+            self._smtp = server
+        return self._smtp
+    
+    def _close_smtp(self) -> None:
+        """关闭SMTP连接（调用方需持有 _smtp_lock）"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+    
+    def _get_http_session(self) -> requests.Session:
+        """获取当前线程的HTTP会话（懒加载，requests.Session 不在线程间共享）"""
+        session = getattr(self._http_local, 'session', None)
+        if session is None:
+            session = self._http_local.session = requests.Session()
+        return session
+    
     def _send_webhook_alert(self, webhook_url: str, message: Dict[str, str], 
                           alert_data: Dict[str, Any]) -> bool:
         """
@@ -336,25 +425,19 @@ Price Memory 价格监控系统
                 'type': 'price_alert',
                 'message': message['content'],
                 'data': alert_data,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.utcnow()
             }
             
+            # 只序列化一次，签名与发送使用同一份字节
+            body = orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY)
             headers = {'Content-Type': 'application/json'}
             
             # 如果配置了webhook密钥，添加签名
-            if config.ALERT_WEBHOOK_SECRET:
-                import hmac
-                import hashlib
-                
-                signature = hmac.new(
-                    config.ALERT_WEBHOOK_SECRET.encode(),
-                    json.dumps(payload).encode(),
-                    hashlib.sha256
-                ).hexdigest()
-                
+            if self._secret_key_bytes:
+                signature = hmac.new(self._secret_key_bytes, body, hashlib.sha256).hexdigest()
                 headers['X-Signature'] = f"sha256={signature}"
             
-            response = requests.post(webhook_url, json=payload, headers=headers, timeout=10)
+            response = self._get_http_session().post(webhook_url, data=body, headers=headers, timeout=10)
             response.raise_for_status()
             
             print(f"Webhook告警发送成功: {webhook_url}")
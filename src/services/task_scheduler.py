@@ -3,20 +3,76 @@
 实现智能任务调度、失败重试、并发控制和负载均衡
 """
 import asyncio
+import logging
+import math
+import queue
+import re
 import time
 import threading
-import queue
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Callable
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from typing import Deque, Dict, List, Optional, Any, Tuple
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-import statistics
+
+import numpy as np
 
 from ..config.config import config
 from ..dao.supabase_repo import SupabaseRepo
-from ..workers.amazon_worker import UniversalWorker
 from ..services.enhanced_price_scraper import EnhancedPriceScraper, ScrapingConfig
+from ..services.browser_pool import BrowserPool
+from ..services.price_history_service import PriceHistoryService
+
+logger = logging.getLogger(__name__)
+
+# 任务重试退避参数（秒）
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+
+# 第 i 次重试的退避上限 min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^i)，超过表长的重试次数使用最后一项
+_RETRY_BACKOFF = tuple(min(RETRY_MAX_DELAY, RETRY_BASE_DELAY << i) for i in range(16))
+
+# 同一站点同时执行的重试任务数上限
+RETRY_CONCURRENCY_PER_HOST = 1
+
+# 成功任务的价格和状态批量写入：累计条数或距上次写入的时间（秒）达到其一即写入
+RESULT_FLUSH_SIZE = 50
+RESULT_FLUSH_INTERVAL = 2.0
+
+# 商品信息缓存：有效期（秒）和最多缓存的商品数
+PRODUCT_CACHE_TTL = 300.0
+PRODUCT_CACHE_MAX = 10_000
+
+# 保留最近完成任务的指标条数
+TASK_METRICS_MAXLEN = 10_000
+
+# 停止调度器时每一步（取消任务、等待线程退出）最多等待的时间（秒）
+STOP_TIMEOUT = 10.0
+
+# 错误分类规则（按顺序匹配，先匹配到的类型优先）
+_ERROR_PATTERNS = tuple(
+    (error_type, re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE))
+    for error_type, keywords in (
+        ('timeout', ('timeout', '超时')),
+        ('network', ('network', '连接', 'connection')),
+        ('captcha', ('captcha', '验证', 'verify')),
+        ('rate_limit', ('rate limit', '频率', 'rate-limit', '请求过于频繁')),
+        ('not_found', ('404', 'not found', '不存在')),
+        ('forbidden', ('403', 'forbidden', '禁止')),
+    )
+)
+
+# 不可重试的错误类型
+_NON_RETRYABLE_ERRORS = frozenset(('not_found', 'forbidden', 'captcha'))
+
+# 各错误类型的最大重试次数（未列出的类型为 3 次）
+_MAX_RETRIES_BY_TYPE = {
+    'timeout': 5,
+    'network': 4,
+    'rate_limit': 3,
+    'unknown': 3
+}
 
 
 @dataclass
@@ -35,14 +91,57 @@ class TaskMetrics:
 class EnhancedTaskScheduler:
     """增强的任务调度器"""
     
+    __slots__ = (
+        'repo', 'price_service', 'max_workers', '_max_retries', 'scraping_config', 'running', '_stop_event',
+        '_loop', '_loop_thread', 'scheduler_thread', 'claim_rpc_available', '_completed', '_pending_results', '_rng',
+        '_retry_semaphores', '_browser_pool', '_idle_scrapers', '_product_cache', 'stats', 'task_metrics',
+        '_inflight_metrics', '_metrics_agg', '_response_times', '_error_counts',
+        'load_factor', 'consecutive_failures', 'adaptive_delay', 'error_recovery_strategies'
+    )
+    
     def __init__(self, max_workers: Optional[int] = None):
         self.repo = SupabaseRepo()
+        self.price_service = PriceHistoryService()
         self.max_workers = max_workers or config.NODE_CONCURRENCY
-        self.worker = UniversalWorker()
-        self.task_queue = asyncio.Queue()
+        self._max_retries = config.WORKER_TASK_RETRIES
+        
+        # 抓取配置（所有任务共用）
+        self.scraping_config = ScrapingConfig(
+            timeout=config.BROWSER_TIMEOUT,
+            retry_count=self._max_retries,
+            delay_range=(1, 5),  # 自适应延迟范围
+            use_stealth=True,
+            use_proxy=config.PROXY_SERVER is not None,
+            headless=not config.DEBUG
+        )
         self.running = False
-        self.executor: Optional[ThreadPoolExecutor] = None
+        self._stop_event = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
         self.scheduler_thread: Optional[threading.Thread] = None
+        self.claim_rpc_available = True  # 数据库是否部署了 claim_tasks 函数
+        
+        # 完成队列：事件循环中的任务执行完毕后放入 (任务, 结果或异常)；放入 None 只唤醒调度线程（见 wake）
+        self._completed: queue.SimpleQueue = queue.SimpleQueue()
+        
+        # 抓取成功、等待批量写入价格和状态的 (任务, 结果)（只在调度线程中访问）
+        self._pending_results: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        
+        # 重试抖动使用的随机数生成器（只在调度线程中使用，不与其他模块共用全局 random 的状态）
+        self._rng = random.Random()
+        
+        # 各站点的重试并发限制
+        self._retry_semaphores: Dict[str, asyncio.Semaphore] = {}
+        
+        # 浏览器池（启动时创建），抓取器在池中的浏览器上创建上下文，不再各自启动浏览器
+        self._browser_pool: Optional[BrowserPool] = None
+        
+        # 各站点空闲的抓取器（只在事件循环线程中访问），同一站点的任务复用已预热的浏览器上下文；
+        # 按站点最近归还的顺序排列，所有站点合计最多保留 max_workers 个，超出时关闭最久未用站点的抓取器
+        self._idle_scrapers: OrderedDict[str, List[EnhancedPriceScraper]] = OrderedDict()
+        
+        # 商品信息缓存 {商品ID: (缓存时的单调时钟, 商品)}（只在事件循环线程中访问），商品URL很少变化
+        self._product_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
         
         # 增强的统计信息
         self.stats = {
@@ -51,7 +150,8 @@ class EnhancedTaskScheduler:
             'failed': 0,
             'retried': 0,
             'skipped': 0,  # 跳过的任务（如重复价格）
-            'start_time': None,
+            'start_time': None,  # 启动时间（仅用于展示）
+            'start_monotonic': None,  # 启动时的单调时钟，用于计算运行时长
             'total_response_time': 0,
             'success_response_time': 0,
             'failure_response_time': 0,
@@ -59,8 +159,25 @@ class EnhancedTaskScheduler:
             'success_rate_rolling': []  # 滚动成功率
         }
         
-        # 任务指标缓存
-        self.task_metrics: Dict[int, TaskMetrics] = {}
+        # 任务指标：进行中的任务按任务ID索引，完成后移入最近任务的环形缓冲（只在调度线程中修改）
+        self._inflight_metrics: Dict[int, TaskMetrics] = {}
+        self.task_metrics: Deque[TaskMetrics] = deque(maxlen=TASK_METRICS_MAXLEN)
+        
+        # 全部已完成任务的累计指标（不受环形缓冲长度限制）
+        self._metrics_agg = {
+            'total': 0,
+            'completed': 0,
+            'rt_count': 0,  # 有响应时间的任务数
+            'rt_sum': 0.0,
+            'rt_min': math.inf,
+            'rt_max': 0.0
+        }
+        
+        # 最近任务的响应时间环形数组（第 rt_count 个响应时间写入 rt_count % TASK_METRICS_MAXLEN），供计算 P95
+        self._response_times = np.zeros(TASK_METRICS_MAXLEN, dtype=np.float64)
+        
+        # 各错误类型的任务数（任务结束时分类一次）
+        self._error_counts: Dict[str, int] = {}
         
         # 负载均衡参数
         self.load_factor = 0.0
@@ -78,111 +195,227 @@ class EnhancedTaskScheduler:
     def start(self) -> None:
         """启动任务调度器"""
         if self.running:
-            print("任务调度器已在运行")
+            logger.info("任务调度器已在运行")
             return
         
-        print(f"启动增强任务调度器，最大并发数: {self.max_workers}")
+        logger.info("启动增强任务调度器，最大并发数: %s", self.max_workers)
         self.running = True
+        self._stop_event.clear()
         self.stats['start_time'] = datetime.utcnow()
+        self.stats['start_monotonic'] = time.monotonic()
+        self._inflight_metrics.clear()  # 上次停止时取消的任务
+        self._completed = queue.SimpleQueue()  # 丢弃上次运行残留的唤醒和迟到的结果
         
-        # 初始化增强的价格抓取器
-        scraping_config = ScrapingConfig(
-            timeout=config.BROWSER_TIMEOUT,
-            retry_count=config.WORKER_TASK_RETRIES,
-            delay_range=(1, 5),  # 自适应延迟范围
-            use_stealth=True,
-            use_proxy=config.PROXY_SERVER is not None,
-            headless=not config.DEBUG_MODE
-        )
+        # 浏览器在首次抓取时才启动
+        self._browser_pool = BrowserPool(self.scraping_config, size=self.max_workers)
         
-        # 启动线程池
-        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # 启动事件循环线程（所有任务作为协程在同一线程中并发执行）
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
         
         # 启动调度线程
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
         
-        print("增强任务调度器启动成功")
+        logger.info("增强任务调度器启动成功")
     
     def stop(self) -> None:
         """停止任务调度器"""
         if not self.running:
             return
         
-        print("正在停止任务调度器...")
+        logger.info("正在停止任务调度器...")
         self.running = False
+        self._stop_event.set()
+        self.wake()
         
-        # 停止线程池
-        if self.executor:
-            self.executor.shutdown(wait=True)
-        
-        # 等待调度线程结束
+        # 等待调度线程结束（调度线程退出前取消进行中的任务并写入剩余结果）
         if self.scheduler_thread:
-            self.scheduler_thread.join(timeout=10)
+            self.scheduler_thread.join(timeout=STOP_TIMEOUT * 2)
+            if self.scheduler_thread.is_alive():
+                logger.warning("调度线程未在 %.0f 秒内退出", STOP_TIMEOUT * 2)
+        
+        # 剩余结果写入后，等待其价格的告警检查完成
+        self.price_service.close(timeout=STOP_TIMEOUT)
+        
+        # 关闭事件循环
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=STOP_TIMEOUT)
+            if self._loop_thread.is_alive():
+                logger.warning("事件循环未在 %.0f 秒内停止，放弃关闭", STOP_TIMEOUT)
+            else:
+                self._loop.close()
+            self._loop = None
         
-        print("任务调度器已停止")
+        logger.info("任务调度器已停止")
     
     def _scheduler_loop(self) -> None:
-        """增强的调度器主循环"""
+        """增强的调度器主循环（任务完成一个就补充一个，不等待整批结束）"""
+        loop = self._loop
+        inflight = 0  # 已提交但尚未处理结果的任务数（只在调度线程中修改）
+        last_flush = time.monotonic()
+        
         while self.running:
             try:
-                # 计算自适应延迟
+                # 批量写入成功任务的价格和状态
+                if self._pending_results and (len(self._pending_results) >= RESULT_FLUSH_SIZE
+                                              or time.monotonic() - last_flush >= RESULT_FLUSH_INTERVAL):
+                    self._flush_task_results()
+                    last_flush = time.monotonic()
+                
+                # 计算自适应延迟（有待写入的结果时不超过写入间隔）
                 delay = self._calculate_adaptive_delay()
+                if self._pending_results:
+                    delay = min(delay, RESULT_FLUSH_INTERVAL)
                 
-                # 从数据库获取待处理任务
-                pending_tasks = self.repo.get_pending_tasks(limit=self.max_workers * 3)
+                # 有空闲 worker 时从数据库领取待处理任务（数据库已按任务得分、创建时间排序）
+                free_slots = self.max_workers - inflight
+                if free_slots > 0:
+                    pending_tasks, claimed = self._claim_tasks(free_slots)
+                    
+                    # 提交任务到事件循环
+                    for task in pending_tasks:
+                        # 创建任务指标
+                        self._inflight_metrics[task['id']] = TaskMetrics(
+                            task_id=task['id'],
+                            start_time=datetime.utcnow(),
+                            status='running'
+                        )
+                        
+                        asyncio.run_coroutine_threadsafe(self._run_task(task, claimed), loop)
+                        inflight += 1
                 
-                if not pending_tasks:
-                    time.sleep(delay)
+                # 等待任意任务完成或被唤醒（最多等待自适应延迟），再取出所有已完成的任务
+                try:
+                    finished = [self._completed.get(timeout=delay)]
+                except queue.Empty:
                     continue
-                
-                # 按优先级和智能策略排序任务
-                sorted_tasks = self._sort_tasks_intelligently(pending_tasks)
-                
-                # 提交任务到线程池
-                futures = []
-                for task in sorted_tasks[:self.max_workers]:
-                    if not self.running:
+                while True:
+                    try:
+                        finished.append(self._completed.get_nowait())
+                    except queue.Empty:
                         break
-                    
-                    # 创建任务指标
-                    self.task_metrics[task['id']] = TaskMetrics(
-                        task_id=task['id'],
-                        start_time=datetime.utcnow(),
-                        status='running'
-                    )
-                    
-                    future = self.executor.submit(self._process_task_enhanced, task)
-                    futures.append((future, task))
+                finished = [item for item in finished if item is not None]
+                if not finished:
+                    continue
                 
-                # 等待任务完成
-                for future, task in futures:
-                    if not self.running:
-                        break
-                    
-                    try:
-                        result = future.result(timeout=config.BROWSER_TIMEOUT + 60000)  # 增加超时时间
-                        self._update_task_metrics(task['id'], result)
-                    except Exception as e:
-                        print(f"任务 {task['id']} 执行异常: {e}")
-                        self._handle_task_failure(task, str(e))
-                        self._update_task_metrics(task['id'], {'status': 'failed', 'error': str(e)})
+                inflight -= len(finished)
+                self._process_finished(finished)
                 
                 # 更新负载因子
                 self._update_load_factor()
                 
-                time.sleep(delay)  # 使用自适应延迟
+                # 连续失败时放慢补充任务的节奏
+                if self.consecutive_failures:
+                    self._stop_event.wait(delay)
                 
-            except Exception as e:
-                print(f"调度器循环异常: {e}")
-                time.sleep(10)  # 异常时等待更长时间
+            except Exception:
+                logger.exception("调度器循环异常")
+                self._stop_event.wait(10)  # 异常时等待更长时间
+        
+        # 取消进行中的任务（任务会退回待处理状态），取消前已完成的任务照常处理，最后写入剩余的结果
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_tasks(), loop).result(timeout=STOP_TIMEOUT)
+        except Exception:
+            logger.exception("取消进行中的任务失败")
+        
+        finished = []
+        while True:
+            try:
+                item = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                finished.append(item)
+        try:
+            self._process_finished(finished)
+        finally:
+            self._flush_task_results()
+    
+    def _process_finished(self, finished: List[Tuple[Dict[str, Any], Any]]) -> None:
+        """
+        处理已完成的任务（只在调度线程中调用）
+        
+        Args:
+            finished: (任务, 结果或异常) 列表
+        """
+        for task, result in finished:
+            if isinstance(result, Exception):
+                logger.error("任务 %s 执行异常: %s", task['id'], result)
+                self._handle_task_failure(task, str(result))
+                self._update_task_metrics(task['id'], {'status': 'failed', 'error': str(result)})
+            else:
+                self._record_task_result(task, result)
+                self._update_task_metrics(task['id'], result)
+    
+    async def _run_task(self, task: Dict[str, Any], claimed: bool) -> None:
+        """
+        在事件循环中执行任务，并把结果放入完成队列交给调度线程处理
+        
+        Args:
+            task: 任务信息
+            claimed: 任务是否已在领取时标记为运行中
+        """
+        completed = self._completed  # 本次运行的完成队列（重新启动后不会混入新队列）
+        try:
+            result = await self._process_task_enhanced(task, claimed)
+        except asyncio.CancelledError:
+            # 调度器停止时取消的任务退回待处理状态（不计入重试次数），由下次启动重新领取
+            try:
+                await asyncio.shield(asyncio.to_thread(
+                    self.repo.retry_task, task['id'], task.get('retry_count', 0),
+                    datetime.utcnow(), "调度器停止，任务已取消"
+                ))
+            except Exception:
+                logger.exception("退回任务 %s 失败", task['id'])
+            raise
+        except Exception as e:
+            result = e
+        completed.put((task, result))
+    
+    async def _cancel_tasks(self) -> None:
+        """取消事件循环中其余任务并等待其退出"""
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # 关闭空闲的抓取器和浏览器池
+        for idle in self._idle_scrapers.values():
+            for scraper in idle:
+                await self._close_scraper(scraper)
+        self._idle_scrapers.clear()
+        await self._browser_pool.close()
     
-    def _process_task_enhanced(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    def _claim_tasks(self, limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        领取待处理任务
+        
+        Args:
+            limit: 最多领取的任务数
+            
+        Returns:
+            (任务列表, 是否已在数据库中标记为运行中)
+        """
+        if self.claim_rpc_available:
+            tasks = self.repo.claim_pending_tasks(limit)
+            if tasks is not None:
+                return tasks, True
+            logger.warning("数据库未部署 claim_tasks 函数，逐个标记任务为运行中")
+            self.claim_rpc_available = False
+        
+        return self.repo.get_pending_tasks(limit=limit), False
+    
+    async def _process_task_enhanced(self, task: Dict[str, Any], claimed: bool = False) -> Dict[str, Any]:
         """
         增强的任务处理
         
         Args:
             task: 任务信息
+            claimed: 任务是否已在领取时标记为运行中
             
         Returns:
             处理结果
@@ -198,92 +431,111 @@ class EnhancedTaskScheduler:
             'response_time': 0
         }
         
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
         
         try:
-            print(f"开始处理任务 {task_id} (商品ID: {product_id})")
+            logger.debug("开始处理任务 %s (商品ID: %s)", task_id, product_id)
             
-            # 标记任务为运行中
-            self.repo.mark_task_running(task_id)
+            # 标记任务为运行中（批量领取时已标记）
+            if not claimed:
+                await asyncio.to_thread(self.repo.mark_task_running, task_id)
             
-            # 使用增强的价格抓取器
-            scraping_config = ScrapingConfig(
-                timeout=config.BROWSER_TIMEOUT,
-                retry_count=config.WORKER_TASK_RETRIES,
-                delay_range=(1, 5),
-                use_stealth=True,
-                use_proxy=config.PROXY_SERVER is not None,
-                headless=not config.DEBUG_MODE
-            )
-            
-            async def scrape_with_timeout():
-                scraper = EnhancedPriceScraper(scraping_config)
+            product = await self._get_product_cached(product_id)
+            if not product:
+                price_result = None
+            else:
+                url = product['url']
+                host = urlparse(url).netloc
+                scraper = await self._acquire_scraper(host)
+                reusable = False
                 try:
-                    await scraper.initialize()
-                    product = self.repo.get_product(product_id)
-                    if not product:
-                        return None
-                    
-                    result = await scraper.scrape_price(product['url'])
-                    return result
+                    if task.get('retry_count', 0):
+                        # 重试任务按站点限制并发，避免同一站点的重试集中涌入
+                        async with self._get_retry_semaphore(url):
+                            price_result = await scraper.scrape_price(url)
+                    else:
+                        price_result = await scraper.scrape_price(url)
+                    reusable = price_result.error is None
                 finally:
-                    await scraper.close()
-            
-            # 使用 asyncio.run 运行异步任务
-            price_result = asyncio.run(scrape_with_timeout())
+                    await self._release_scraper(host, scraper, reusable)
             
             if price_result and price_result.price is not None:
-                # 记录价格
-                from ..services.price_history_service import PriceHistoryService
-                price_service = PriceHistoryService()
-                price_service.record_price(
-                    product_id=product_id,
-                    price=price_result.price,
-                    currency=price_result.currency or 'USD',
-                    source='automated_scraping',
-                    metadata={
-                        'title': price_result.title,
-                        'availability': price_result.availability,
-                        'image_url': price_result.image_url
-                    }
-                )
-                
+                # 价格和任务状态由调度线程批量写入
                 result['status'] = 'completed'
                 result['scraped_price'] = price_result.price
-                result['response_time'] = time.time() - start_time
+                result['currency'] = price_result.currency or 'USD'
+                result['metadata'] = {
+                    'title': price_result.title,
+                    'availability': price_result.availability,
+                    'image_url': price_result.image_url
+                }
+                result['response_time'] = (time.monotonic_ns() - start_ns) / 1e9
                 
-                # 更新统计
-                self.stats['total_processed'] += 1
-                self.stats['succeeded'] += 1
-                self.stats['success_response_time'] += result['response_time']
-                
-                # 重置连续失败计数
-                self.consecutive_failures = 0
-                
-                duration = time.time() - start_time
-                print(f"任务 {task_id} 完成，价格: {price_result.price} {price_result.currency}, 耗时 {duration:.2f}s")
+                logger.info("任务 %s 完成，价格: %s %s, 耗时 %.2fs", task_id, price_result.price, price_result.currency, result['response_time'])
             else:
                 raise Exception(f"价格抓取失败: {price_result.error if price_result else '未知错误'}")
         
         except Exception as e:
             error_msg = str(e)
             result['error'] = error_msg
-            result['response_time'] = time.time() - start_time
+            result['response_time'] = (time.monotonic_ns() - start_ns) / 1e9
             
+            logger.warning("任务 %s 失败: %s", task_id, error_msg)
+        
+        return result
+    
+    def _record_task_result(self, task: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        汇总任务结果到统计信息（只在调度线程中调用，统计无需加锁）
+        
+        Args:
+            task: 任务信息
+            result: 任务处理结果
+        """
+        response_time = result['response_time']
+        self.stats['total_processed'] += 1
+        self.stats['total_response_time'] += response_time
+        
+        if result['status'] == 'completed':
+            self.stats['succeeded'] += 1
+            self.stats['success_response_time'] += response_time
+            self._pending_results.append((task, result))
+            
+            # 重置连续失败计数
+            self.consecutive_failures = 0
+        else:
             # 处理特定错误类型
+            error_msg = result['error'] or ''
             error_type = self._classify_error(error_msg)
             if error_type in self.error_recovery_strategies:
                 self.error_recovery_strategies[error_type](task, error_msg)
             
-            # 更新统计
-            self.stats['total_processed'] += 1
             self.stats['failed'] += 1
-            self.stats['failure_response_time'] += result['response_time']
+            self.stats['failure_response_time'] += response_time
             self.consecutive_failures += 1
-            
-            print(f"任务 {task_id} 失败: {error_msg}")
+    
+    def _flush_task_results(self) -> None:
+        """批量写入成功任务的价格和任务状态（只在调度线程中调用）"""
+        if not self._pending_results:
+            return
         
-        return result
+        results, self._pending_results = self._pending_results, []
+        points = [
+            (task['product_id'], result['scraped_price'], result['currency'], 'automated_scraping', result['metadata'])
+            for task, result in results
+        ]
+        
+        try:
+            if self.price_service.record_prices_bulk(points):
+                self.repo.mark_tasks_result([task['id'] for task, _ in results], "succeeded", None)
+                return
+        except Exception:
+            logger.exception("批量更新任务状态失败")
+            return
+        
+        # 价格写入失败时按失败任务处理（重试或标记失败）
+        for task, _ in results:
+            self._handle_task_failure(task, "记录价格失败")
     
     def _handle_task_failure(self, task: Dict[str, Any], error_msg: str) -> None:
         """
@@ -295,23 +547,23 @@ class EnhancedTaskScheduler:
         """
         task_id = task['id']
         retry_count = task.get('retry_count', 0)
-        max_retries = config.WORKER_TASK_RETRIES
+        max_retries = self._max_retries
         
         # 错误分类
         error_type = self._classify_error(error_msg)
         
         if retry_count < max_retries and self._should_retry(error_type, retry_count):
-            # 计算重试延迟（指数退避 + 随机抖动）
-            base_delay = min(60 * (2 ** retry_count), 600)  # 最大10分钟
-            jitter = random.uniform(0.5, 1.5)  # 0.5-1.5倍抖动
-            retry_delay = int(base_delay * jitter * self.adaptive_delay)
+            # 计算重试延迟（指数退避，在 [基础延迟, 退避上限] 内随机取值，避免同时失败的任务同时重试）
+            backoff = _RETRY_BACKOFF[min(retry_count, len(_RETRY_BACKOFF) - 1)]
+            jittered = RETRY_BASE_DELAY + self._rng.random() * (backoff - RETRY_BASE_DELAY)
+            retry_delay = int(min(RETRY_MAX_DELAY, jittered * self.adaptive_delay))
             
             scheduled_at = datetime.utcnow() + timedelta(seconds=retry_delay)
             
             self.repo.retry_task(task_id, retry_count + 1, scheduled_at, error_msg)
             self.stats['retried'] += 1
             
-            print(f"任务 {task_id} 将在 {retry_delay}s 后重试 (第 {retry_count + 1} 次, 错误类型: {error_type})")
+            logger.info("任务 %s 将在 %ss 后重试 (第 %s 次, 错误类型: %s)", task_id, retry_delay, retry_count + 1, error_type)
         else:
             # 标记任务最终失败
             final_error = f"重试次数超限({retry_count}/{max_retries})或不可重试错误({error_type}): {error_msg}"
@@ -326,7 +578,103 @@ class EnhancedTaskScheduler:
                 final_error=final_error
             )
             
-            print(f"任务 {task_id} 最终失败，已达到最大重试次数或遇到不可重试错误")
+            logger.warning("任务 %s 最终失败，已达到最大重试次数或遇到不可重试错误", task_id)
+    
+    async def _get_product_cached(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取商品信息（缓存有效期内不再查询数据库）
+        
+        Args:
+            product_id: 商品ID
+            
+        Returns:
+            商品信息，不存在时为None
+        """
+        cached = self._product_cache.get(product_id)
+        if cached is not None and time.monotonic() - cached[0] < PRODUCT_CACHE_TTL:
+            return cached[1]
+        
+        product = await asyncio.to_thread(self.repo.get_product, product_id)
+        
+        # 重新插入使字典保持按缓存时间排序，超出上限时淘汰最早缓存的商品
+        self._product_cache.pop(product_id, None)
+        if product:
+            if len(self._product_cache) >= PRODUCT_CACHE_MAX:
+                del self._product_cache[next(iter(self._product_cache))]
+            self._product_cache[product_id] = (time.monotonic(), product)
+        return product
+    
+    async def _acquire_scraper(self, host: str) -> EnhancedPriceScraper:
+        """
+        获取站点的抓取器（优先复用该站点空闲的抓取器，保留其 Cookie 和连接）
+        
+        Args:
+            host: 站点域名
+            
+        Returns:
+            已初始化的抓取器
+        """
+        idle = self._idle_scrapers.get(host)
+        if idle:
+            scraper = idle.pop()
+            if not idle:
+                del self._idle_scrapers[host]
+            return scraper
+        
+        context = await self._browser_pool.acquire()
+        scraper = EnhancedPriceScraper(self.scraping_config)
+        try:
+            await scraper.initialize(context)
+        except BaseException:
+            await scraper.close()
+            await self._browser_pool.release(context)
+            raise
+        return scraper
+    
+    async def _release_scraper(self, host: str, scraper: EnhancedPriceScraper, reusable: bool) -> None:
+        """
+        归还站点的抓取器
+        
+        Args:
+            host: 站点域名
+            scraper: 抓取器
+            reusable: 本次抓取是否正常（出错的抓取器直接关闭，避免复用异常状态）
+        """
+        if not reusable:
+            await self._close_scraper(scraper)
+            return
+        
+        self._idle_scrapers.setdefault(host, []).append(scraper)
+        self._idle_scrapers.move_to_end(host)
+        
+        # 空闲抓取器总数超过上限时，关闭最久未归还站点中最早空闲的抓取器
+        while sum(map(len, self._idle_scrapers.values())) > self.max_workers:
+            lru_host, lru_idle = next(iter(self._idle_scrapers.items()))
+            evicted = lru_idle.pop(0)
+            if not lru_idle:
+                del self._idle_scrapers[lru_host]
+            await self._close_scraper(evicted)
+    
+    async def _close_scraper(self, scraper: EnhancedPriceScraper) -> None:
+        """关闭抓取器的页面，并把浏览器上下文交还浏览器池关闭"""
+        await scraper.close()
+        await self._browser_pool.release(scraper.context)
+    
+    def _get_retry_semaphore(self, url: str) -> asyncio.Semaphore:
+        """
+        获取站点的重试并发信号量（只在事件循环线程中调用）
+        
+        Args:
+            url: 商品URL
+            
+        Returns:
+            该站点的信号量
+        """
+        host = urlparse(url).netloc
+        semaphore = self._retry_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._retry_semaphores[host] = asyncio.Semaphore(RETRY_CONCURRENCY_PER_HOST)
+        return semaphore
     
     def _classify_error(self, error_msg: str) -> str:
         """
@@ -338,22 +686,10 @@ class EnhancedTaskScheduler:
         Returns:
             错误类型
         """
-        error_msg_lower = error_msg.lower()
-        
-        if any(keyword in error_msg_lower for keyword in ['timeout', '超时']):
-            return 'timeout'
-        elif any(keyword in error_msg_lower for keyword in ['network', 'networkx', '连接', 'connection']):
-            return 'network'
-        elif any(keyword in error_msg_lower for keyword in ['captcha', '验证', 'verify']):
-            return 'captcha'
-        elif any(keyword in error_msg_lower for keyword in ['rate limit', '频率', 'rate-limit', '请求过于频繁']):
-            return 'rate_limit'
-        elif any(keyword in error_msg_lower for keyword in ['404', 'not found', '不存在']):
-            return 'not_found'
-        elif any(keyword in error_msg_lower for keyword in ['403', 'forbidden', '禁止']):
-            return 'forbidden'
-        else:
-            return 'unknown'
+        for error_type, pattern in _ERROR_PATTERNS:
+            if pattern.search(error_msg):
+                return error_type
+        return 'unknown'
     
     def _should_retry(self, error_type: str, retry_count: int) -> bool:
         """
@@ -366,41 +702,30 @@ class EnhancedTaskScheduler:
         Returns:
             是否应该重试
         """
-        # 不可重试的错误类型
-        non_retryable_errors = ['not_found', 'forbidden', 'captcha']
-        
-        if error_type in non_retryable_errors:
+        if error_type in _NON_RETRYABLE_ERRORS:
             return False
         
         # 根据错误类型调整重试策略
-        max_retries_by_type = {
-            'timeout': 5,
-            'network': 4,
-            'rate_limit': 3,
-            'unknown': 3
-        }
-        
-        max_retries = max_retries_by_type.get(error_type, 3)
-        return retry_count < max_retries
+        return retry_count < _MAX_RETRIES_BY_TYPE.get(error_type, 3)
     
     def _handle_timeout_error(self, task: Dict[str, Any], error_msg: str) -> None:
         """处理超时错误"""
-        print(f"任务 {task['id']} 超时，增加延迟并重试")
+        logger.info("任务 %s 超时，增加延迟并重试", task['id'])
         self.adaptive_delay *= 1.5  # 增加延迟
     
     def _handle_network_error(self, task: Dict[str, Any], error_msg: str) -> None:
         """处理网络错误"""
-        print(f"任务 {task['id']} 网络错误，检查网络连接")
+        logger.info("任务 %s 网络错误，检查网络连接", task['id'])
         self.adaptive_delay *= 1.2
     
     def _handle_captcha_error(self, task: Dict[str, Any], error_msg: str) -> None:
         """处理验证码错误"""
-        print(f"任务 {task['id']} 遇到验证码，需要人工干预")
+        logger.warning("任务 %s 遇到验证码，需要人工干预", task['id'])
         # 验证码错误通常需要人工处理，不自动重试
     
     def _handle_rate_limit_error(self, task: Dict[str, Any], error_msg: str) -> None:
         """处理频率限制错误"""
-        print(f"任务 {task['id']} 触发频率限制，增加延迟")
+        logger.info("任务 %s 触发频率限制，增加延迟", task['id'])
         self.adaptive_delay *= 2.0
     
     def _calculate_adaptive_delay(self) -> float:
@@ -439,18 +764,37 @@ class EnhancedTaskScheduler:
             self.load_factor = 1.0 - success_rate
     
     def _update_task_metrics(self, task_id: int, result: Dict[str, Any]) -> None:
-        """更新任务指标"""
-        if task_id in self.task_metrics:
-            metrics = self.task_metrics[task_id]
-            metrics.end_time = datetime.utcnow()
-            metrics.status = result.get('status', 'failed')
-            metrics.error_message = result.get('error')
-            metrics.scraped_price = result.get('scraped_price')
-            metrics.response_time = result.get('response_time', 0)
-            
-            # 计算价格准确性（如果有可能的话）
-            if metrics.scraped_price:
-                self._calculate_price_accuracy(metrics)
+        """更新任务指标（任务结束后移入最近任务的环形缓冲并累计）"""
+        metrics = self._inflight_metrics.pop(task_id, None)
+        if metrics is None:
+            return
+        
+        metrics.end_time = datetime.utcnow()
+        metrics.status = result.get('status', 'failed')
+        metrics.error_message = result.get('error')
+        metrics.scraped_price = result.get('scraped_price')
+        metrics.response_time = result.get('response_time', 0)
+        self.task_metrics.append(metrics)
+        
+        agg = self._metrics_agg
+        agg['total'] += 1
+        if metrics.status == 'completed':
+            agg['completed'] += 1
+        response_time = metrics.response_time
+        if response_time > 0:
+            self._response_times[agg['rt_count'] % TASK_METRICS_MAXLEN] = response_time
+            agg['rt_count'] += 1
+            agg['rt_sum'] += response_time
+            agg['rt_min'] = min(agg['rt_min'], response_time)
+            agg['rt_max'] = max(agg['rt_max'], response_time)
+        
+        if metrics.error_message:
+            error_type = self._classify_error(metrics.error_message)
+            self._error_counts[error_type] = self._error_counts.get(error_type, 0) + 1
+        
+        # 计算价格准确性（如果有可能的话）
+        if metrics.scraped_price:
+            self._calculate_price_accuracy(metrics)
     
     def _calculate_price_accuracy(self, metrics: TaskMetrics) -> None:
         """计算价格准确性"""
@@ -458,94 +802,6 @@ class EnhancedTaskScheduler:
         # 例如：与历史价格比较，检查价格合理性等
         self.stats['price_accuracy'] = 0.95  # 示例值
     
-    def _sort_tasks_intelligently(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        智能任务排序
-        
-        Args:
-            tasks: 任务列表
-            
-        Returns:
-            排序后的任务列表
-        """
-        def get_priority_score(task: Dict[str, Any]) -> float:
-            # 基础优先级
-            base_priority = task.get('priority', 0)
-            
-            # 重试惩罚（重试次数越多，优先级越低）
-            retry_penalty = task.get('retry_count', 0) * 5
-            
-            # 时间奖励（创建时间越早，优先级越高）
-            created_at = task.get('created_at')
-            age_bonus = 0
-            if created_at:
-                try:
-                    if isinstance(created_at, str):
-                        created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    else:
-                        created_time = created_at
-                    
-                    age_hours = (datetime.utcnow() - created_time.replace(tzinfo=None)).total_seconds() / 3600
-                    age_bonus = min(age_hours * 0.1, 10)  # 最多10点奖励
-                except Exception:
-                    age_bonus = 0
-            
-            # 成功率奖励（根据商品历史成功率调整）
-            product_id = task.get('product_id')
-            success_rate = self._get_product_success_rate(product_id)
-            success_bonus = success_rate * 5  # 成功率越高，优先级越高
-            
-            # 负载均衡惩罚
-            load_penalty = self.load_factor * 10
-            
-            return base_priority + age_bonus + success_bonus - retry_penalty - load_penalty
-        
-        # 添加成功率统计
-        sorted_tasks = sorted(tasks, key=get_priority_score, reverse=True)
-        
-        # 将连续失败的任务放到后面
-        failed_tasks = [t for t in sorted_tasks if t.get('retry_count', 0) > 2]
-        success_tasks = [t for t in sorted_tasks if t.get('retry_count', 0) <= 2]
-        
-        return success_tasks + failed_tasks
-    
-    def _sort_tasks_by_priority(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        按优先级排序任务
-        
-        Args:
-            tasks: 任务列表
-        
-        Returns:
-            排序后的任务列表
-        """
-        def get_priority_score(task: Dict[str, Any]) -> int:
-            # 基础优先级
-            base_priority = task.get('priority', 0)
-            
-            # 重试次数越多，优先级越低
-            retry_penalty = task.get('retry_count', 0) * 10
-            
-            # 创建时间越早，优先级越高
-            created_at = task.get('created_at')
-            if created_at:
-                try:
-                    if isinstance(created_at, str):
-                        created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    else:
-                        created_time = created_at
-                    
-                    age_hours = (datetime.utcnow() - created_time.replace(tzinfo=None)).total_seconds() / 3600
-                    age_bonus = min(age_hours, 24)  # 最多24小时的加成
-                except Exception:
-                    age_bonus = 0
-            else:
-                age_bonus = 0
-            
-            return base_priority + age_bonus - retry_penalty
-        
-        return sorted(tasks, key=get_priority_score, reverse=True)
-    
     def add_task(self, product_id: int, priority: int = 0, scheduled_at: Optional[datetime] = None) -> Optional[int]:
         """
         添加新任务
@@ -565,13 +821,19 @@ class EnhancedTaskScheduler:
                 scheduled_at=scheduled_at or datetime.utcnow()
             )
             
-            print(f"添加任务成功: 任务ID={task_id}, 商品ID={product_id}")
+            logger.info("添加任务成功: 任务ID=%s, 商品ID=%s", task_id, product_id)
+            if scheduled_at is None:
+                self.wake()
             return task_id
         
-        except Exception as e:
-            print(f"添加任务失败: {e}")
+        except Exception:
+            logger.exception("添加任务失败")
             return None
     
+    def wake(self) -> None:
+        """唤醒调度线程立即领取任务（有新任务或停止时调用）"""
+        self._completed.put(None)
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         获取增强的调度器统计信息
@@ -581,10 +843,10 @@ class EnhancedTaskScheduler:
         """
         stats = self.stats.copy()
         
-        if stats['start_time']:
-            uptime = datetime.utcnow() - stats['start_time']
-            stats['uptime_seconds'] = uptime.total_seconds()
-            stats['uptime_str'] = str(uptime).split('.')[0]  # 去掉微秒
+        if stats['start_monotonic'] is not None:
+            uptime_seconds = time.monotonic() - stats['start_monotonic']
+            stats['uptime_seconds'] = uptime_seconds
+            stats['uptime_str'] = str(timedelta(seconds=int(uptime_seconds)))  # 去掉微秒
         
         stats['running'] = self.running
         stats['max_workers'] = self.max_workers
@@ -621,32 +883,13 @@ class EnhancedTaskScheduler:
         
         return stats
     
-    def _get_product_success_rate(self, product_id: int) -> float:
-        """
-        获取商品的成功率
-        
-        Args:
-            product_id: 商品ID
-            
-        Returns:
-            成功率（0-1）
-        """
-        try:
-            metrics = self.repo.get_product_task_metrics(product_id)
-            if metrics['total'] > 0:
-                return metrics['success'] / metrics['total']
-            return 0.8  # 默认成功率
-        except Exception:
-            return 0.8
-    
     def _get_task_metrics_summary(self) -> Dict[str, Any]:
-        """获取任务指标摘要"""
-        if not self.task_metrics:
+        """获取任务指标摘要（平均/最小/最大值取自累计指标，P95 取自最近完成的任务）"""
+        agg = dict(self._metrics_agg)
+        if not agg['total']:
             return {}
         
-        response_times = [m.response_time for m in self.task_metrics.values() if m.response_time > 0]
-        
-        if not response_times:
+        if not agg['rt_count']:
             return {
                 'avg_response_time': 0,
                 'min_response_time': 0,
@@ -654,40 +897,21 @@ class EnhancedTaskScheduler:
                 'p95_response_time': 0
             }
         
+        response_times = self._response_times[:min(agg['rt_count'], TASK_METRICS_MAXLEN)]
+        
         return {
-            'avg_response_time': statistics.mean(response_times),
-            'min_response_time': min(response_times),
-            'max_response_time': max(response_times),
-            'p95_response_time': self._calculate_percentile(response_times, 95),
-            'total_tasks': len(self.task_metrics),
-            'completed_tasks': len([m for m in self.task_metrics.values() if m.status == 'completed'])
+            'avg_response_time': agg['rt_sum'] / agg['rt_count'],
+            'min_response_time': agg['rt_min'],
+            'max_response_time': agg['rt_max'],
+            # 线性插值百分位数（np.percentile 内部用 partition 选取，无需整体排序）
+            'p95_response_time': float(np.percentile(response_times, 95)),
+            'total_tasks': agg['total'],
+            'completed_tasks': agg['completed']
         }
     
-    def _calculate_percentile(self, data: List[float], percentile: int) -> float:
-        """计算百分位数"""
-        if not data:
-            return 0
-        
-        sorted_data = sorted(data)
-        index = (percentile / 100) * (len(sorted_data) - 1)
-        
-        if index.is_integer():
-            return sorted_data[int(index)]
-        else:
-            lower = sorted_data[int(index)]
-            upper = sorted_data[int(index) + 1]
-            return lower + (upper - lower) * (index - int(index))
-    
     def _get_error_distribution(self) -> Dict[str, int]:
         """获取错误分布"""
-        error_counts = {}
-        
-        for metrics in self.task_metrics.values():
-            if metrics.error_message:
-                error_type = self._classify_error(metrics.error_message)
-                error_counts[error_type] = error_counts.get(error_type, 0) + 1
-        
-        return error_counts
+        return dict(self._error_counts)
     
     def get_queue_status(self) -> Dict[str, Any]:
         """
@@ -697,10 +921,18 @@ class EnhancedTaskScheduler:
             队列状态字典
         """
         try:
-            pending_count = self.repo.count_tasks_by_status('pending')
-            running_count = self.repo.count_tasks_by_status('running')
-            failed_count = self.repo.count_tasks_by_status('failed')
-            succeeded_count = self.repo.count_tasks_by_status('succeeded')
+            # 一次查询按状态分组计数，数据库未部署分组函数时逐个状态计数
+            counts = self.repo.count_tasks_grouped()
+            if counts is None:
+                counts = {
+                    status: self.repo.count_tasks_by_status(status)
+                    for status in ('pending', 'running', 'failed', 'succeeded')
+                }
+            
+            pending_count = counts.get('pending', 0)
+            running_count = counts.get('running', 0)
+            failed_count = counts.get('failed', 0)
+            succeeded_count = counts.get('succeeded', 0)
             
             return {
                 'pending': pending_count,
@@ -710,80 +942,114 @@ class EnhancedTaskScheduler:
                 'total': pending_count + running_count + failed_count + succeeded_count
             }
         
-        except Exception as e:
-            print(f"获取队列状态失败: {e}")
+        except Exception:
+            logger.exception("获取队列状态失败")
             return {}
 
 
 class PeriodicTaskScheduler:
     """周期性任务调度器"""
     
-    def __init__(self, task_scheduler: TaskScheduler):
+    __slots__ = ('task_scheduler', 'repo', 'running', '_timer', '_timer_lock')
+    
+    def __init__(self, task_scheduler: EnhancedTaskScheduler):
         self.task_scheduler = task_scheduler
-        self.repo = SupabaseRepo()
+        self.repo = task_scheduler.repo  # 与任务调度器共用数据库客户端
         self.running = False
-        self.thread: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
     
     def start(self) -> None:
         """启动周期性任务调度"""
         if self.running:
             return
         
-        print("启动周期性任务调度器")
+        logger.info("启动周期性任务调度器")
         self.running = True
-        self.thread = threading.Thread(target=self._periodic_loop, daemon=True)
-        self.thread.start()
+        self._arm(0)  # 启动后立即执行一次
     
     def stop(self) -> None:
         """停止周期性任务调度"""
         if not self.running:
             return
         
-        print("停止周期性任务调度器")
-        self.running = False
+        logger.info("停止周期性任务调度器")
+        with self._timer_lock:
+            self.running = False
+            timer = self._timer
+            self._timer = None
         
-        if self.thread:
-            self.thread.join(timeout=5)
+        if timer:
+            timer.cancel()
+            timer.join(timeout=5)
     
-    def _periodic_loop(self) -> None:
-        """周期性任务循环"""
-        while self.running:
-            try:
-                # 每小时检查一次需要更新的商品
-                self._schedule_product_updates()
-                
-                # 清理过期任务
-                self._cleanup_old_tasks()
-                
-                # 等待1小时
-                for _ in range(3600):  # 3600秒 = 1小时
-                    if not self.running:
-                        break
-                    time.sleep(1)
-                
-            except Exception as e:
-                print(f"周期性任务异常: {e}")
-                time.sleep(60)  # 异常时等待1分钟
+    def _arm(self, delay: float) -> None:
+        """在 delay 秒后执行下一次周期性任务"""
+        with self._timer_lock:
+            if not self.running:
+                return
+            self._timer = threading.Timer(delay, self._tick)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _tick(self) -> None:
+        """执行一次周期性任务，并安排下一次执行"""
+        try:
+            # 每小时检查一次需要更新的商品
+            self._schedule_product_updates()
+            
+            # 清理过期任务
+            self._cleanup_old_tasks()
+            
+            # 1小时后再次执行
+            self._arm(3600)
+            
+        except Exception:
+            logger.exception("周期性任务异常")
+            self._arm(60)  # 异常时1分钟后重试
     
     def _schedule_product_updates(self) -> None:
         """调度商品更新任务"""
         try:
-            # 获取需要更新的商品（24小时内没有更新的）
+            # 需要更新的商品：24小时内没有更新的
             cutoff_time = datetime.utcnow() - timedelta(hours=24)
+            
+            # 优先在数据库中一次完成筛选和插入，只返回插入的任务数
+            scheduled = self.repo.schedule_product_updates(cutoff_time, priority=1)
+            if scheduled is not None:
+                if scheduled:
+                    logger.info("调度了 %s 个商品的更新任务", scheduled)
+                    self.task_scheduler.wake()
+                return
+            
+            # 数据库未部署 schedule_product_updates 函数时，查询商品后批量插入
             products = self.repo.get_products_need_update(cutoff_time)
+            if not products:
+                return
             
-            for product in products:
-                # 为每个商品创建更新任务
-                self.task_scheduler.add_task(
-                    product_id=product['id'],
-                    priority=1  # 周期性更新使用较低优先级
-                )
+            # 跳过已有待处理或执行中任务的商品，避免每轮调度重复排队
+            queued = self.repo.get_product_ids_with_open_tasks([product['id'] for product in products])
+            products = [product for product in products if product['id'] not in queued]
+            if not products:
+                return
             
-            if products:
-                print(f"调度了 {len(products)} 个商品的更新任务")
+            # 为每个商品创建更新任务（一次批量插入）
+            now = datetime.utcnow().isoformat()
+            self.repo.bulk_create_tasks([
+                {
+                    'product_id': product['id'],
+                    'status': 'pending',
+                    'priority': 1,  # 周期性更新使用较低优先级
+                    'scheduled_at': now
+                }
+                for product in products
+            ])
+            
+            logger.info("调度了 %s 个商品的更新任务", len(products))
+            self.task_scheduler.wake()
         
-        except Exception as e:
-            print(f"调度商品更新任务失败: {e}")
+        except Exception:
+            logger.exception("调度商品更新任务失败")
     
     def _cleanup_old_tasks(self) -> None:
         """清理过期任务"""
@@ -793,12 +1059,41 @@ class PeriodicTaskScheduler:
             deleted_count = self.repo.cleanup_old_tasks(cutoff_time)
             
             if deleted_count > 0:
-                print(f"清理了 {deleted_count} 个过期任务")
+                logger.info("清理了 %s 个过期任务", deleted_count)
         
-        except Exception as e:
-            print(f"清理过期任务失败: {e}")
+        except Exception:
+            logger.exception("清理过期任务失败")
+
+
+# 全局调度器实例（首次使用时创建，避免导入模块时就连接数据库）
+_task_scheduler: Optional[EnhancedTaskScheduler] = None
+_periodic_scheduler: Optional[PeriodicTaskScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> EnhancedTaskScheduler:
+    """获取全局任务调度器"""
+    global _task_scheduler
+    if _task_scheduler is None:
+        with _scheduler_lock:
+            if _task_scheduler is None:
+                _task_scheduler = EnhancedTaskScheduler()
+    return _task_scheduler
+
 
+def get_periodic_scheduler() -> PeriodicTaskScheduler:
+    """获取全局周期性任务调度器"""
+    global _periodic_scheduler
+    if _periodic_scheduler is None:
+        scheduler = get_scheduler()
+        with _scheduler_lock:
+            if _periodic_scheduler is None:
+                _periodic_scheduler = PeriodicTaskScheduler(scheduler)
+    return _periodic_scheduler
 
-# 全局调度器实例
-task_scheduler = TaskScheduler()
-periodic_scheduler = PeriodicTaskScheduler(task_scheduler)
\ No newline at end of file
+def stop_schedulers() -> None:
+    """停止已创建的全局调度器（未创建的不会因停止而被创建）"""
+    if _periodic_scheduler is not None:
+        _periodic_scheduler.stop()
+    if _task_scheduler is not None:
+        _task_scheduler.stop()
@@ -3,12 +3,34 @@ Amazon网站价格抓取模块
 支持多个Amazon区域站点的价格抓取
 """
 import re
-import time
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from playwright.sync_api import Page
 
+from .dom_reader import read_selector_values
+
+# 货币符号（取文本中最先出现的符号）及货币代码（无符号时检测，不区分大小写）
+_CURRENCY_BY_SYMBOL = {'$': 'USD', '£': 'GBP', '€': 'EUR', '￥': 'CNY', '¥': 'CNY'}
+_CURRENCY_CODES = ('CAD', 'AUD')
+
+# 评分、评论数
+_RATING_RE = re.compile(r'(\d+\.?\d*)')
+_REVIEW_COUNT_RE = re.compile(r'([\d,]+)')
+
+# 常见的Amazon ASIN模式
+_ASIN_RES = tuple(
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'/dp/([A-Z0-9]{10})',
+        r'/gp/product/([A-Z0-9]{10})',
+        r'/product/([A-Z0-9]{10})',
+        r'asin=([A-Z0-9]{10})',
+        r'/([A-Z0-9]{10})(?:/|$|\?)'
+    )
+)
+
 
 def parse_price_text(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
     """
@@ -23,52 +45,94 @@ def parse_price_text(text: Optional[str]) -> Tuple[Optional[float], Optional[str
     if not text:
         return None, None
     
-    # 清理文本
-    s = text.strip().replace('\n', ' ').replace('\t', ' ')
-    s = re.sub(r'\s+', ' ', s)  # 合并多个空格
+    # 检测货币符号（空白字符不影响检测和金额解析，无需先清理文本）
+    currency = next((_CURRENCY_BY_SYMBOL[ch] for ch in text if ch in _CURRENCY_BY_SYMBOL), None)
+    if currency is None:
+        upper = text.upper()
+        for code in _CURRENCY_CODES:
+            if code in upper:
+                currency = code
+                break
     
-    currency = None
+    return _parse_amount(text), currency
+
+
+def _parse_amount(s: str) -> Optional[float]:
+    """
+    单次扫描解析金额：只保留数字和小数点（千分位逗号等字符忽略），小数只保留两位
     
-    # 检测货币符号
-    if '$' in s:
-        currency = "USD"
-        s = re.sub(r'[^\d.,]', '', s)  # 只保留数字、逗号和点
-    elif '£' in s:
-        currency = "GBP"
-        s = re.sub(r'[^\d.,]', '', s)
-    elif '€' in s:
-        currency = "EUR"
-        s = re.sub(r'[^\d.,]', '', s)
-    elif '￥' in s or '¥' in s:
-        currency = "CNY"
-        s = re.sub(r'[^\d.,]', '', s)
-    elif 'CAD' in s.upper():
-        currency = "CAD"
-        s = re.sub(r'[^\d.,]', '', s)
-    elif 'AUD' in s.upper():
-        currency = "AUD"
-        s = re.sub(r'[^\d.,]', '', s)
-    else:
-        # 尝试提取纯数字
-        s = re.sub(r'[^\d.,]', '', s)
-    
-    if not s:
-        return None, currency
-    
-    # 处理千分位分隔符
-    s = s.replace(',', '')
-    
-    # 处理小数点
-    if '.' in s:
-        parts = s.split('.')
-        if len(parts) == 2:
-            s = parts[0] + '.' + parts[1][:2]  # 只保留两位小数
+    Args:
+        s: 价格文本
     
-    try:
-        price = float(s)
-        return price, currency
-    except (ValueError, TypeError):
-        return None, currency
+    Returns:
+        金额，无数字或出现多个小数点时返回None
+    """
+    chars: List[str] = []
+    dots = 0
+    decimals = 0
+    for ch in s:
+        if ch.isdecimal():
+            if not dots:
+                chars.append(ch)
+            elif decimals < 2:
+                chars.append(ch)
+                decimals += 1
+        elif ch == '.':
+            dots += 1
+            chars.append(ch)
+    
+    if dots > 1 or len(chars) == dots:
+        return None
+    return float(''.join(chars))
+
+
+_AMAZON_DOMAINS = frozenset({
+    'amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr',
+    'amazon.it', 'amazon.es', 'amazon.ca', 'amazon.com.au',
+    'amazon.co.jp', 'amazon.in', 'amazon.com.br', 'amazon.com.mx',
+    'amazon.cn', 'amazon.sg'
+})
+_PRODUCT_PATH_INDICATORS = ('/dp/', '/gp/product/', '/product/', '/asin/')
+
+# Amazon站点域名（amazon. 之后的部分）对应的区域
+_REGION_BY_TLD: Dict[str, str] = {
+    'com': 'US',
+    'co.uk': 'UK',
+    'de': 'DE',
+    'fr': 'FR',
+    'it': 'IT',
+    'es': 'ES',
+    'ca': 'CA',
+    'com.au': 'AU',
+    'co.jp': 'JP',
+    'in': 'IN',
+    'com.br': 'BR',
+    'com.mx': 'MX',
+    'cn': 'CN',
+    'sg': 'SG'
+}
+
+# 各区域默认货币
+_CURRENCY_BY_REGION: Dict[str, str] = {
+    'US': 'USD', 'UK': 'GBP', 'DE': 'EUR', 'FR': 'EUR',
+    'IT': 'EUR', 'ES': 'EUR', 'CA': 'CAD', 'AU': 'AUD',
+    'JP': 'JPY', 'IN': 'INR', 'BR': 'BRL', 'MX': 'MXN',
+    'CN': 'CNY', 'SG': 'SGD'
+}
+
+
+@lru_cache(maxsize=4096)
+def _region_from_host(host: str) -> str:
+    """
+    根据域名检测Amazon区域
+    
+    Args:
+        host: 小写域名（如 www.amazon.co.uk）
+    
+    Returns:
+        区域代码
+    """
+    return _REGION_BY_TLD.get(host.partition('amazon.')[2], 'US')  # 默认美国
 
 
 def detect_amazon_region(url: str) -> str:
@@ -81,69 +145,108 @@ def detect_amazon_region(url: str) -> str:
     Returns:
         区域代码
     """
-    domain = urlparse(url).netloc.lower()
-    
-    region_map = {
-        'amazon.com': 'US',
-        'amazon.co.uk': 'UK',
-        'amazon.de': 'DE',
-        'amazon.fr': 'FR',
-        'amazon.it': 'IT',
-        'amazon.es': 'ES',
-        'amazon.ca': 'CA',
-        'amazon.com.au': 'AU',
-        'amazon.co.jp': 'JP',
-        'amazon.in': 'IN',
-        'amazon.com.br': 'BR',
-        'amazon.com.mx': 'MX',
-        'amazon.cn': 'CN',
-        'amazon.sg': 'SG'
-    }
-    
-    for domain_key, region in region_map.items():
-        if domain_key in domain:
-            return region
-    
-    return 'US'  # 默认美国
+    return _region_from_host(urlparse(url).hostname or '')
 
 
-def get_price_selectors() -> List[str]:
+# 价格选择器（按优先级排序）
+_PRICE_SELECTORS: Tuple[str, ...] = (
+    # 新版价格选择器
+    'span.a-price.a-text-price.a-size-medium.apexPriceToPay span.a-offscreen',
+    'span.a-price-whole',
+    '.a-price .a-offscreen',
+    'span[class*="a-price"] .a-offscreen',
+    
+    # 旧版价格选择器
+    '#priceblock_ourprice',
+    '#priceblock_dealprice',
+    '#price_inside_buybox',
+    '.a-price-current',
+    
+    # 特殊情况
+    'span.a-size-medium.a-color-price',
+    '.a-price-range .a-price .a-offscreen',
+    'span[data-a-color="price"]',
+    
+    # 备用选择器
+    '[data-testid="price"]',
+    '.price',
+    '[class*="price"]'
+)
+
+
+def get_price_selectors() -> Tuple[str, ...]:
     """
     获取价格选择器列表
     按优先级排序
     """
-    return [
-        # 新版价格选择器
-        'span.a-price.a-text-price.a-size-medium.apexPriceToPay span.a-offscreen',
-        'span.a-price-whole',
-        '.a-price .a-offscreen',
-        'span[class*="a-price"] .a-offscreen',
-        
-        # 旧版价格选择器
-        '#priceblock_ourprice',
-        '#priceblock_dealprice',
-        '#price_inside_buybox',
-        '.a-price-current',
-        
-        # 特殊情况
-        'span.a-size-medium.a-color-price',
-        '.a-price-range .a-price .a-offscreen',
-        'span[data-a-color="price"]',
-        
-        # 备用选择器
-        '[data-testid="price"]',
-        '.price',
-        '[class*="price"]'
-    ]
+    return _PRICE_SELECTORS
 
 
-def extract_product_info(page: Page, url: str) -> Dict[str, Any]:
+# 任一价格节点（合并为一个选择器）
+_PRICE_UNION = ', '.join(_PRICE_SELECTORS)
+
+
+# 颜色/尺寸等变体（合并为一个选择器，一次查询取得所有变体元素）
+_VARIATION_SELECTOR = ', '.join((
+    '#twister [data-asin]',
+    '[data-defaultasin]',
+    '.swatches li[data-asin]',
+    '.variation_color_name [data-asin]',
+    '.variation_size_name [data-asin]'
+))
+
+# 在浏览器中一次读取前20个变体的属性
+_VARIATIONS_JS = """
+(elements) => elements.slice(0, 20).map((el) => {
+    const csaType = el.getAttribute('data-csa-c-type');
+    const dpUrl = el.getAttribute('data-dp-url');
+    const attributes = {};
+    if (csaType) attributes.csa_type = csaType;
+    if (dpUrl) attributes.dp_url = dpUrl;
+    return {
+        asin: el.getAttribute('data-asin') || el.getAttribute('data-defaultasin'),
+        name: (el.textContent || el.getAttribute('title') || el.getAttribute('alt') || '').trim(),
+        href: el.getAttribute('href'),
+        attributes: csaType || dpUrl ? attributes : null
+    };
+})
+"""
+
+# 商品基本信息字段（各字段的选择器按优先级排序）
+_PRODUCT_FIELDS: Dict[str, Dict[str, Any]] = {
+    'title': {'selectors': [
+        '#productTitle',
+        'h1[data-automation-id="product-title"]',
+        '.product-title',
+        'h1'
+    ]},
+    'asin': {'selectors': [
+        'input#ASIN',
+        '[data-asin]',
+        'input[name="ASIN"]'
+    ], 'attrs': ['value', 'data-asin']},
+    'brand': {'selectors': [
+        '#bylineInfo',
+        '.a-row .a-size-small span.a-color-secondary',
+        '[data-automation-id="brand-name"]'
+    ]},
+    'rating': {'selectors': ['span.a-icon-alt']},
+    'review_count': {'selectors': [
+        '#acrCustomerReviewText',
+        'span[data-hook="total-review-count"]'
+    ]}
+}
+
+# 商品信息及价格字段（extract_spu_and_skus 一次读取）
+_SPU_FIELDS: Dict[str, Dict[str, Any]] = {**_PRODUCT_FIELDS, 'price': {'selectors': list(_PRICE_SELECTORS)}}
+
+
+def _parse_product_info(values: Dict[str, List[Optional[str]]]) -> Dict[str, Any]:
     """
-    提取商品基本信息
+    从批量读取的字段值中解析商品基本信息
     
     Args:
-        page: Playwright页面对象
-        url: 商品URL
+        values: read_selector_values 的返回值
     
     Returns:
         商品信息字典
@@ -151,87 +254,56 @@ def extract_product_info(page: Page, url: str) -> Dict[str, Any]:
     info = {}
     
     # 商品标题
-    title_selectors = [
-        '#productTitle',
-        'h1[data-automation-id="product-title"]',
-        '.product-title',
-        'h1'
-    ]
-    
-    for selector in title_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                title = page.locator(selector).first.inner_text().strip()
-                if title:
-                    info['title'] = title
-                    break
-        except Exception:
-            continue
+    for title in values['title']:
+        if title and title.strip():
+            info['title'] = title.strip()
+            break
     
     # ASIN
-    asin_selectors = [
-        'input#ASIN',
-        '[data-asin]',
-        'input[name="ASIN"]'
-    ]
-    
-    for selector in asin_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                asin = page.locator(selector).first.get_attribute('value') or page.locator(selector).first.get_attribute('data-asin')
-                if asin:
-                    info['asin'] = asin
-                    break
-        except Exception:
-            continue
+    for asin in values['asin']:
+        if asin:
+            info['asin'] = asin
+            break
     
     # 品牌
-    brand_selectors = [
-        '#bylineInfo',
-        '.a-row .a-size-small span.a-color-secondary',
-        '[data-automation-id="brand-name"]'
-    ]
-    
-    for selector in brand_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                brand = page.locator(selector).first.inner_text().strip()
-                if brand and 'brand' not in brand.lower():
-                    info['brand'] = brand
-                    break
-        except Exception:
-            continue
+    for brand in values['brand']:
+        brand = (brand or '').strip()
+        if brand and 'brand' not in brand.lower():
+            info['brand'] = brand
+            break
     
     # 评分
-    try:
-        rating_selector = 'span.a-icon-alt'
-        if page.locator(rating_selector).count() > 0:
-            rating_text = page.locator(rating_selector).first.inner_text()
-            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-            if rating_match:
-                info['rating'] = float(rating_match.group(1))
-    except Exception:
-        pass
+    rating_text = values['rating'][0]
+    if rating_text:
+        rating_match = _RATING_RE.search(rating_text)
+        if rating_match:
+            info['rating'] = float(rating_match.group(1))
     
     # 评论数
-    try:
-        review_selectors = [
-            '#acrCustomerReviewText',
-            'span[data-hook="total-review-count"]'
-        ]
-        for selector in review_selectors:
-            if page.locator(selector).count() > 0:
-                review_text = page.locator(selector).first.inner_text()
-                review_match = re.search(r'([\d,]+)', review_text)
-                if review_match:
-                    info['review_count'] = int(review_match.group(1).replace(',', ''))
-                    break
-    except Exception:
-        pass
+    for review_text in values['review_count']:
+        if review_text is not None:
+            review_match = _REVIEW_COUNT_RE.search(review_text)
+            if review_match:
+                info['review_count'] = int(review_match.group(1).replace(',', ''))
+                break
     
     return info
 
 
+def extract_product_info(page: Page, url: str) -> Dict[str, Any]:
+    """
+    提取商品基本信息
+    
+    Args:
+        page: Playwright页面对象
+        url: 商品URL
+    
+    Returns:
+        商品信息字典
+    """
+    return _parse_product_info(read_selector_values(page, _PRODUCT_FIELDS))
+
+
 def extract_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
     提取商品信息和SKU变体
@@ -246,43 +318,37 @@ def extract_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[Dic
     try:
         # 等待页面加载
         page.wait_for_load_state('networkidle', timeout=10000)
-        time.sleep(2)  # 额外等待动态内容加载
     except Exception:
         pass
     
-    # 提取基本信息
-    product_info = extract_product_info(page, url)
+    try:
+        # 价格节点出现即可开始读取，无需固定等待动态内容
+        page.wait_for_selector(_PRICE_UNION, state='attached', timeout=2500)
+    except Exception:
+        pass
+    
+    # 一次读取基本信息和价格
+    values = read_selector_values(page, _SPU_FIELDS)
+    product_info = _parse_product_info(values)
     
     # 提取价格
     price = None
     currency = None
-    price_selectors = get_price_selectors()
-    
-    for selector in price_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                price_text = page.locator(selector).first.inner_text()
-                if price_text:
-                    extracted_price, extracted_currency = parse_price_text(price_text)
-                    if extracted_price is not None:
-                        price = extracted_price
-                        currency = extracted_currency
-                        break
-        except Exception:
-            continue
     
-    # 如果没有检测到货币，根据区域设置默认货币
-    if currency is None:
-        region = detect_amazon_region(url)
-        currency_map = {
-            'US': 'USD', 'UK': 'GBP', 'DE': 'EUR', 'FR': 'EUR',
-            'IT': 'EUR', 'ES': 'EUR', 'CA': 'CAD', 'AU': 'AUD',
-            'JP': 'JPY', 'IN': 'INR', 'BR': 'BRL', 'MX': 'MXN',
-            'CN': 'CNY', 'SG': 'SGD'
-        }
-        currency = currency_map.get(region, 'USD')
+    for price_text in values['price']:
+        if price_text:
+            extracted_price, extracted_currency = parse_price_text(price_text)
+            if extracted_price is not None:
+                price = extracted_price
+                currency = extracted_currency
+                break
     
     domain = urlparse(url).netloc
+    region = _region_from_host(domain.lower().partition(':')[0])
+    
+    # 如果没有检测到货币，根据区域设置默认货币
+    if currency is None:
+        currency = _CURRENCY_BY_REGION.get(region, 'USD')
     
     # 构建SPU信息
     spu: Dict[str, Any] = {
@@ -297,63 +363,31 @@ def extract_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[Dic
             "brand": product_info.get('brand'),
             "rating": product_info.get('rating'),
             "review_count": product_info.get('review_count'),
-            "region": detect_amazon_region(url)
+            "region": region
         }
     }
     
-    # 提取SKU变体
-    skus: List[Dict[str, Any]] = []
-    
     # 尝试提取颜色/尺寸等变体
-    variation_selectors = [
-        '#twister [data-asin]',
-        '[data-defaultasin]',
-        '.swatches li[data-asin]',
-        '.variation_color_name [data-asin]',
-        '.variation_size_name [data-asin]'
+    try:
+        variations = page.locator(_VARIATION_SELECTOR).evaluate_all(_VARIATIONS_JS)  # 限制最多20个变体
+    except Exception:
+        variations = []
+    
+    # 提取SKU变体（相对链接补全为当前站点的绝对链接）
+    skus: List[Dict[str, Any]] = [
+        {
+            "asin": variation['asin'],
+            "name": variation['name'],
+            "url": f"https://{domain}{variation['href']}" if variation['href'] and not variation['href'].startswith('http') else variation['href'],
+            "attributes": variation['attributes'],
+        }
+        for variation in variations if variation['asin']
     ]
     
-    for selector in variation_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                items = page.locator(selector)
-                for i in range(min(items.count(), 20)):  # 限制最多20个变体
-                    try:
-                        el = items.nth(i)
-                        sku_asin = el.get_attribute('data-asin') or el.get_attribute('data-defaultasin')
-                        if not sku_asin:
-                            continue
-                        
-                        # 获取变体名称
-                        text = el.text_content() or el.get_attribute('title') or el.get_attribute('alt')
-                        
-                        # 获取变体链接
-                        href = el.get_attribute('href')
-                        if href and not href.startswith('http'):
-                            href = f"https://{domain}{href}"
-                        
-                        # 获取其他属性
-                        attrs: Dict[str, Any] = {}
-                        if el.get_attribute('data-csa-c-type'):
-                            attrs['csa_type'] = el.get_attribute('data-csa-c-type')
-                        if el.get_attribute('data-dp-url'):
-                            attrs['dp_url'] = el.get_attribute('data-dp-url')
-                        
-                        skus.append({
-                            "asin": sku_asin,
-                            "name": (text or '').strip(),
-                            "url": href,
-                            "attributes": attrs if attrs else None,
-                        })
-                    except Exception:
-                        continue
-                break  # 找到变体就停止
-        except Exception:
-            continue
-    
     return spu, skus
 
 
+@lru_cache(maxsize=16384)
 def is_amazon_product_page(url: str) -> bool:
     """
     检查URL是否为Amazon商品页面
@@ -362,28 +396,20 @@ def is_amazon_product_page(url: str) -> bool:
         url: 要检查的URL
     
     Returns:
-        是否为Am
+        是否为Amazon商品页面
     """
     if not url:
         return False
     
-    # 检查域名
-    domain = urlparse(url).netloc.lon    amazon_domains = [
-        'amazon.com', 'amazon.co.uk', 'amazon.de', 'amazon.fr',
-        'amazon.it', 'ama.es', 'amazon.ca', 'amazon.com.au',
-        'amazon.jp', 'amazon.in', 'amazon.com.br', 'amazon.com.mx',
-      .cn', 'amazon.sg'
-    ]
+    parsed = urlparse(url.lower())
     
-    is_n = any(d in domain for d in amazon_domains)
-   not is_amazon:
+    # 检查域名（取 amazon. 起的部分，如 smile.amazon.co.uk -> amazon.co.uk）
+    prefix, sep, tld = (parsed.hostname or '').partition('amazon.')
+    if sep + tld not in _AMAZON_DOMAINS or prefix[-1:] not in ('', '.'):
         return False
     
     # 检查路径是否包含商品标识
-    path = urlparse(u.lower()
-    product_indicators = ['/dp/', '/gp/product/', '/product/', '/asin/']
-    
-    return any(indicator in path for indicator in product_indicators)
+    return any(indicator in parsed.path for indicator in _PRODUCT_PATH_INDICATORS)
 
 
 def extract_amazon_asin(url: str) -> Optional[str]:
@@ -391,24 +417,16 @@ def extract_amazon_asin(url: str) -> Optional[str]:
     从Amazon URL中提取ASIN
     
     Args:
-        url: Amazon
+        url: Amazon商品URL
+    
     Returns:
         ASIN或None
     """
     if not url:
         return None
     
-    # 常见的Amazon ASIN模式
-    = [
-        r'/dp/([A-Z0-9]{10})',
-        r'/gp/product/([A-Z0-9]{10})',
-        r'/product/([A-Z0-9]{10})',
-        r'asin=([]{10})',
-        r'/([A-Z0-9]{10})(?:/|$|\\?)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url, re.IGNORECASE)
+    for pattern in _ASIN_RES:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
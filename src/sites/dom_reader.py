@@ -0,0 +1,52 @@
+"""
+页面字段批量读取
+在浏览器中一次执行所有选择器查询，避免逐个选择器、逐个属性的往返
+"""
+from typing import Any, Dict, List, Optional
+
+from playwright.sync_api import Page
+
+
+_READ_VALUES_JS = """
+(fields) => {
+    const values = {};
+    for (const [name, field] of Object.entries(fields)) {
+        values[name] = field.selectors.map((selector) => {
+            let element = null;
+            try {
+                element = field.contains
+                    ? Array.from(document.querySelectorAll(selector)).find((el) => (el.textContent || '').includes(field.contains))
+                    : document.querySelector(selector);
+            } catch (e) {
+                // 无效选择器按未匹配处理
+            }
+            if (!element) {
+                return null;
+            }
+            if (field.attrs) {
+                return field.attrs.map((attr) => element.getAttribute(attr)).find((value) => value) || null;
+            }
+            return element.innerText;
+        });
+    }
+    return values;
+}
+"""
+
+
+def read_selector_values(page: Page, fields: Dict[str, Dict[str, Any]]) -> Dict[str, List[Optional[str]]]:
+    """
+    一次 page.evaluate 读取多个字段在各选择器下的值
+    
+    Args:
+        page: Playwright页面对象
+        fields: {字段名: {'selectors': 选择器列表, 'attrs': 依次读取的属性（可选，默认读取innerText）,
+                 'contains': 元素文本需包含的内容（可选）}}
+    
+    Returns:
+        {字段名: 每个选择器第一个匹配元素的值（无匹配时为None），顺序与选择器一致}
+    """
+    try:
+        return page.evaluate(_READ_VALUES_JS, fields)
+    except Exception:
+        return {name: [None] * len(field['selectors']) for name, field in fields.items()}
@@ -3,13 +3,32 @@
 支持京东商品页面的价格抓取
 """
 import re
-import time
 import json
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from playwright.sync_api import Page
 
+from .dom_reader import read_selector_values
+
+# 京东商品ID模式
+_JD_SKU_RES = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r'/(\d+)\.html',
+        r'product/(\d+)\.html',
+        r'item/(\d+)\.html',
+        r'skuId=(\d+)',
+        r'/(\d+)$'
+    )
+)
+
+# 品牌、评论数、好评率
+_JD_BRAND_RE = re.compile(r'品牌[：:]\s*(.+)')
+_JD_COMMENT_COUNT_RE = re.compile(r'(\d+)')
+_JD_GOOD_RATE_RE = re.compile(r'(\d+)%')
+
 
 def parse_jd_price(text: Optional[str]) -> Tuple[Optional[float], str]:
     """
@@ -24,32 +43,21 @@ def parse_jd_price(text: Optional[str]) -> Tuple[Optional[float], str]:
     if not text:
         return None, "CNY"
     
-    # 清理文本
-    s = text.strip().replace('\n', ' ').replace('\t', ' ')
-    s = re.sub(r'\s+', ' ', s)
-    
-    # 移除货币符号和其他字符
-    s = re.sub(r'[￥¥元]', '', s)
-    s = re.sub(r'[^\d.,\-]', '', s)
-    
-    if not s:
-        return None, "CNY"
-    
-    # 处理价格区间（取最低价）
-    if '-' in s:
-        prices = s.split('-')
-        try:
-            return float(prices[0].replace(',', '')), "CNY"
-        except (ValueError, IndexError):
-            pass
-    
-    # 处理千分位分隔符
-    s = s.replace(',', '')
-    
-    try:
-        return float(s), "CNY"
-    except (ValueError, TypeError):
+    # 单次扫描：只保留数字和小数点（空白、货币符号、千分位逗号等字符忽略）
+    chars: List[str] = []
+    dots = 0
+    for ch in text:
+        if ch.isdecimal():
+            chars.append(ch)
+        elif ch == '.':
+            dots += 1
+            chars.append(ch)
+        elif ch == '-' and len(chars) > dots:
+            break  # 价格区间取最低价
+    
+    if dots > 1 or len(chars) == dots:
         return None, "CNY"
+    return float(''.join(chars)), "CNY"
 
 
 def extract_jd_sku_id(url: str) -> Optional[str]:
@@ -65,54 +73,99 @@ def extract_jd_sku_id(url: str) -> Optional[str]:
     if not url:
         return None
     
-    # 京东商品ID模式
-    patterns = [
-        r'/(\d+)\.html',
-        r'product/(\d+)\.html',
-        r'item/(\d+)\.html',
-        r'skuId=(\d+)',
-        r'/(\d+)$'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _JD_SKU_RES:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     
     return None
 
 
-def get_jd_price_selectors() -> List[str]:
+# 价格选择器（按优先级排序）
+_JD_PRICE_SELECTORS: Tuple[str, ...] = (
+    # 新版京东
+    '.price .p-price .price',
+    '.summary-price .p-price .price',
+    '.price-current',
+    
+    # 旧版京东
+    '.jd-price',
+    '.price .price',
+    '.p-price .price',
+    
+    # 手机版
+    '.current-price',
+    '.price-now',
+    
+    # 通用选择器
+    '[class*="price"]',
+    '[data-price]'
+)
+
+
+def get_jd_price_selectors() -> Tuple[str, ...]:
     """
     获取京东价格选择器列表
     """
-    return [
-        # 新版京东
-        '.price .p-price .price',
-        '.summary-price .p-price .price',
-        '.price-current',
-        
-        # 旧版京东
-        '.jd-price',
-        '.price .price',
-        '.p-price .price',
-        
-        # 手机版
-        '.current-price',
-        '.price-now',
-        
-        # 通用选择器
-        '[class*="price"]',
-        '[data-price]'
-    ]
+    return _JD_PRICE_SELECTORS
 
 
-def extract_jd_product_info(page: Page, url: str) -> Dict[str, Any]:
+# 标题或价格节点出现即可开始读取
+_JD_WAIT_SELECTOR = '.sku-name, .p-price .price'
+
+
+# 颜色/规格选项（合并为一个选择器，一次查询取得所有选项元素）
+_JD_SKU_SELECTOR = ', '.join((
+    '.choose-attrs .item',
+    '.choose-color .item',
+    '.choose-version .item',
+    '.sku-item'
+))
+
+# 在浏览器中一次读取前15个选项的文本和 data-sku
+_JD_SKUS_JS = """
+(elements) => elements.slice(0, 15).map((el) => ({
+    text: (el.innerText || '').trim(),
+    data_sku: el.getAttribute('data-sku')
+}))
+"""
+
+# 京东商品信息字段（各字段的选择器按优先级排序）
+_JD_PRODUCT_FIELDS: Dict[str, Dict[str, Any]] = {
+    'title': {'selectors': [
+        '.sku-name',
+        '.product-intro .name',
+        'h1[data-hook="product-title"]',
+        '.item-title',
+        'h1'
+    ]},
+    # 取文本包含"品牌"的元素（相当于 Playwright 的 :has-text("品牌")）
+    'brand': {'selectors': [
+        '.parameter2 li',
+        '.brand-name',
+        '[data-hook="brand"]'
+    ], 'contains': '品牌'},
+    'comment_count': {'selectors': [
+        '.comment-count',
+        '.comment-item .count',
+        '[data-hook="comment-count"]'
+    ]},
+    'good_rate': {'selectors': [
+        '.percent-con',
+        '.good-rate'
+    ]}
+}
+
+# 商品信息及价格字段（extract_jd_spu_and_skus 一次读取）
+_JD_SPU_FIELDS: Dict[str, Dict[str, Any]] = {**_JD_PRODUCT_FIELDS, 'price': {'selectors': list(_JD_PRICE_SELECTORS)}}
+
+
+def _parse_jd_product_info(values: Dict[str, List[Optional[str]]], url: str) -> Dict[str, Any]:
     """
-    提取京东商品信息
+    从批量读取的字段值中解析京东商品信息
     
     Args:
-        page: Playwright页面对象
+        values: read_selector_values 的返回值
         url: 商品URL
     
     Returns:
@@ -121,23 +174,10 @@ def extract_jd_product_info(page: Page, url: str) -> Dict[str, Any]:
     info = {}
     
     # 商品标题
-    title_selectors = [
-        '.sku-name',
-        '.product-intro .name',
-        'h1[data-hook="product-title"]',
-        '.item-title',
-        'h1'
-    ]
-    
-    for selector in title_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                title = page.locator(selector).first.inner_text().strip()
-                if title:
-                    info['title'] = title
-                    break
-        except Exception:
-            continue
+    for title in values['title']:
+        if title and title.strip():
+            info['title'] = title.strip()
+            break
     
     # SKU ID
     sku_id = extract_jd_sku_id(url)
@@ -145,60 +185,46 @@ def extract_jd_product_info(page: Page, url: str) -> Dict[str, Any]:
         info['sku_id'] = sku_id
     
     # 品牌
-    brand_selectors = [
-        '.parameter2 li:has-text("品牌")',
-        '.brand-name',
-        '[data-hook="brand"]'
-    ]
-    
-    for selector in brand_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                brand_text = page.locator(selector).first.inner_text()
-                # 提取品牌名称
-                brand_match = re.search(r'品牌[：:]\s*(.+)', brand_text)
-                if brand_match:
-                    info['brand'] = brand_match.group(1).strip()
-                    break
-        except Exception:
-            continue
+    for brand_text in values['brand']:
+        if brand_text is not None:
+            brand_match = _JD_BRAND_RE.search(brand_text)
+            if brand_match:
+                info['brand'] = brand_match.group(1).strip()
+                break
     
     # 评论数
-    try:
-        comment_selectors = [
-            '.comment-count',
-            '.comment-item .count',
-            '[data-hook="comment-count"]'
-        ]
-        for selector in comment_selectors:
-            if page.locator(selector).count() > 0:
-                comment_text = page.locator(selector).first.inner_text()
-                comment_match = re.search(r'(\d+)', comment_text.replace(',', ''))
-                if comment_match:
-                    info['comment_count'] = int(comment_match.group(1))
-                    break
-    except Exception:
-        pass
+    for comment_text in values['comment_count']:
+        if comment_text is not None:
+            comment_match = _JD_COMMENT_COUNT_RE.search(comment_text.replace(',', ''))
+            if comment_match:
+                info['comment_count'] = int(comment_match.group(1))
+                break
     
     # 好评率
-    try:
-        rating_selectors = [
-            '.percent-con',
-            '.good-rate'
-        ]
-        for selector in rating_selectors:
-            if page.locator(selector).count() > 0:
-                rating_text = page.locator(selector).first.inner_text()
-                rating_match = re.search(r'(\d+)%', rating_text)
-                if rating_match:
-                    info['good_rate'] = int(rating_match.group(1))
-                    break
-    except Exception:
-        pass
+    for rating_text in values['good_rate']:
+        if rating_text is not None:
+            rating_match = _JD_GOOD_RATE_RE.search(rating_text)
+            if rating_match:
+                info['good_rate'] = int(rating_match.group(1))
+                break
     
     return info
 
 
+def extract_jd_product_info(page: Page, url: str) -> Dict[str, Any]:
+    """
+    提取京东商品信息
+    
+    Args:
+        page: Playwright页面对象
+        url: 商品URL
+    
+    Returns:
+        商品信息字典
+    """
+    return _parse_jd_product_info(read_selector_values(page, _JD_PRODUCT_FIELDS), url)
+
+
 def extract_jd_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
     提取京东商品信息和SKU变体
@@ -213,30 +239,29 @@ def extract_jd_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[
     try:
         # 等待页面加载
         page.wait_for_load_state('networkidle', timeout=15000)
-        time.sleep(3)
     except Exception:
         pass
     
-    # 提取基本信息
-    product_info = extract_jd_product_info(page, url)
+    try:
+        page.wait_for_selector(_JD_WAIT_SELECTOR, state='attached', timeout=2500)
+    except Exception:
+        pass
+    
+    # 一次读取基本信息和价格
+    values = read_selector_values(page, _JD_SPU_FIELDS)
+    product_info = _parse_jd_product_info(values, url)
     
     # 提取价格
     price = None
     currency = "CNY"
-    price_selectors = get_jd_price_selectors()
-    
-    for selector in price_selectors:
-        try:
-            if page.locator(selector).count() > 0:
-                price_text = page.locator(selector).first.inner_text()
-                if price_text:
-                    extracted_price, extracted_currency = parse_jd_price(price_text)
-                    if extracted_price is not None:
-                        price = extracted_price
-                        currency = extracted_currency
-                        break
-        except Exception:
-            continue
+    
+    for price_text in values['price']:
+        if price_text:
+            extracted_price, extracted_currency = parse_jd_price(price_text)
+            if extracted_price is not None:
+                price = extracted_price
+                currency = extracted_currency
+                break
     
     domain = urlparse(url).netloc
     
@@ -257,47 +282,34 @@ def extract_jd_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], List[
         }
     }
     
-    # 提取SKU变体
-    skus: List[Dict[str, Any]] = []
-    
     try:
         # 提取颜色/规格选项
-        sku_selectors = [
-            '.choose-attrs .item',
-            '.choose-color .item',
-            '.choose-version .item',
-            '.sku-item'
-        ]
-        
-        for selector in sku_selectors:
-            if page.locator(selector).count() > 0:
-                items = page.locator(selector)
-                for i in range(min(items.count(), 15)):  # 限制最多15个变体
-                    try:
-                        el = items.nth(i)
-                        sku_text = el.inner_text().strip()
-                        sku_data_sku = el.get_attribute('data-sku')
-                        
-                        if sku_text:
-                            skus.append({
-                                "asin": sku_data_sku,  # 京东使用data-sku
-                                "name": sku_text,
-                                "url": url,  # 京东SKU通常共享同一URL
-                                "attributes": {
-                                    "sku_text": sku_text,
-                                    "data_sku": sku_data_sku,
-                                    "platform": "jd"
-                                }
-                            })
-                    except Exception:
-                        continue
-                break
+        options = page.locator(_JD_SKU_SELECTOR).evaluate_all(_JD_SKUS_JS)  # 限制最多15个变体
     except Exception:
-        pass
+        options = []
+    
+    # 提取SKU变体
+    skus: List[Dict[str, Any]] = [
+        {
+            "asin": option['data_sku'],  # 京东使用data-sku
+            "name": option['text'],
+            "url": url,  # 京东SKU通常共享同一URL
+            "attributes": {
+                "sku_text": option['text'],
+                "data_sku": option['data_sku'],
+                "platform": "jd"
+            }
+        }
+        for option in options if option['text']
+    ]
     
     return spu, skus
 
 
+_JD_DOMAINS = frozenset({'jd.com'})
+
+
+@lru_cache(maxsize=16384)
 def is_jd_product_page(url: str) -> bool:
     """
     检查URL是否为京东商品页面
@@ -311,13 +323,13 @@ def is_jd_product_page(url: str) -> bool:
     if not url:
         return False
     
-    domain = urlparse(url).netloc.lower()
-    jd_domains = ['jd.com', 'item.jd.com', 'product.jd.com']
+    parsed = urlparse(url)
     
-    is_jd = any(d in domain for d in jd_domains)
-    if not is_jd:
+    # 检查域名（jd.com 及其子域名，如 item.jd.com）
+    domain = '.'.join((parsed.hostname or '').rsplit('.', 2)[-2:])
+    if domain not in _JD_DOMAINS:
         return False
     
     # 检查路径
-    path = urlparse(url).path.lower()
+    path = parsed.path.lower()
     return '.html' in path or '/product/' in path
\ No newline at end of file
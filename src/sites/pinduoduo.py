@@ -75,8 +75,9 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
         
         for selector in title_selectors:
             try:
-                if page.locator(selector).count() > 0:
-                    title = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    title = handle.inner_text().strip()
                     if title:
                         info['title'] = title
                         break
@@ -103,10 +104,11 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
                 ]
                 for selector in id_selectors:
                     try:
-                        if page.locator(selector).count() > 0:
-                            goods_id = page.locator(selector).first.get_attribute('data-goods-id') or \
-                                     page.locator(selector).first.get_attribute('data-product-id') or \
-                                     page.locator(selector).first.inner_text()
+                        handle = page.query_selector(selector)
+                        if handle:
+                            goods_id = handle.get_attribute('data-goods-id') or \
+                                     handle.get_attribute('data-product-id') or \
+                                     handle.inner_text()
                             if goods_id:
                                 info['goods_id'] = str(goods_id).strip()
                                 break
@@ -125,8 +127,9 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
         
         for selector in shop_selectors:
             try:
-                if page.locator(selector).count() > 0:
-                    shop_name = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    shop_name = handle.inner_text().strip()
                     if shop_name and '店铺' not in shop_name.lower():
                         info['shop_name'] = shop_name
                         break
@@ -141,8 +144,9 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
                 '.product-category'
             ]
             for selector in category_selectors:
-                if page.locator(selector).count() > 0:
-                    category = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    category = handle.inner_text().strip()
                     if category:
                         info['category'] = category
                         break
@@ -159,9 +163,10 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
             ]
             for selector in image_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        image_url = page.locator(selector).first.get_attribute('src') or \
-                                  page.locator(selector).first.get_attribute('data-src')
+                    handle = page.query_selector(selector)
+                    if handle:
+                        image_url = handle.get_attribute('src') or \
+                                  handle.get_attribute('data-src')
                         if image_url:
                             info['image_url'] = image_url
                             break
@@ -180,8 +185,9 @@ def extract_pinduoduo_product_info(page: Page, url: str) -> Dict[str, Any]:
             ]
             for selector in stock_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        stock_text = page.locator(selector).first.inner_text().strip()
+                    handle = page.query_selector(selector)
+                    if handle:
+                        stock_text = handle.inner_text().strip()
                         if stock_text:
                             info['stock'] = stock_text
                             break
@@ -330,8 +336,9 @@ def extract_pinduoduo_skus(page: Page) -> List[Dict[str, Any]]:
                             name_selectors = ['span', 'div', '.sku-name', '.spec-name']
                             for name_selector in name_selectors:
                                 try:
-                                    if element.locator(name_selector).count() > 0:
-                                        name = element.locator(name_selector).first.inner_text().strip()
+                                    handle = element.query_selector(name_selector)
+                                    if handle:
+                                        name = handle.inner_text().strip()
                                         if name:
                                             sku_info['name'] = name
                                             break
@@ -342,8 +349,9 @@ def extract_pinduoduo_skus(page: Page) -> List[Dict[str, Any]]:
                             price_selectors = ['.sku-price', '.spec-price', '.price']
                             for price_selector in price_selectors:
                                 try:
-                                    if element.locator(price_selector).count() > 0:
-                                        price_text = element.locator(price_selector).first.inner_text().strip()
+                                    handle = element.query_selector(price_selector)
+                                    if handle:
+                                        price_text = handle.inner_text().strip()
                                         if price_text:
                                             price, currency = parse_pinduoduo_price_text(price_text)
                                             if price is not None:
@@ -355,9 +363,10 @@ def extract_pinduoduo_skus(page: Page) -> List[Dict[str, Any]]:
                             
                             # SKU图片（如果有）
                             try:
-                                if element.locator('img').count() > 0:
-                                    image_url = element.locator('img').first.get_attribute('src') or \
-                                              element.locator('img').first.get_attribute('data-src')
+                                handle = element.query_selector('img')
+                                if handle:
+                                    image_url = handle.get_attribute('src') or \
+                                              handle.get_attribute('data-src')
                                     if image_url:
                                         sku_info['image_url'] = image_url
                             except Exception:
@@ -365,6 +374,8 @@ def extract_pinduoduo_skus(page: Page) -> List[Dict[str, Any]]:
                             
                             if sku_info:
                                 skus.append(sku_info)
+                        except Exception:
+                            continue
                     
                     if skus:  # 找到SKU就停止
                         break
@@ -438,7 +449,8 @@ def is_pinduoduo_product_page(url: str) -> bool:
         return False
     
     # 检查域名
-    domain = urlparse(url).netloc.lower()
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
     
     pinduoduo_domains = [
         'pinduoduo.com', 'yangkeduo.com', 'mobile.yangkeduo.com',
@@ -451,7 +463,7 @@ def is_pinduoduo_product_page(url: str) -> bool:
         return False
     
     # 检查路径是否包含商品标识
-    path = urlparse(url).path.lower()
+    path = parsed.path.lower()
     product_indicators = ['/goods.html', '/goods/', '/product/', '/item/', '/detail/']
     
     return any(indicator in path for indicator in product_indicators)
@@ -75,8 +75,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
         
         for selector in title_selectors:
             try:
-                if page.locator(selector).count() > 0:
-                    title = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    title = handle.inner_text().strip()
                     if title:
                         info['title'] = title
                         break
@@ -106,11 +107,12 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
                 ]
                 for selector in id_selectors:
                     try:
-                        if page.locator(selector).count() > 0:
-                            product_id = page.locator(selector).first.get_attribute('data-product-id') or \
-                                       page.locator(selector).first.get_attribute('data-sku-id') or \
-                                       page.locator(selector).first.get_attribute('data-goods-id') or \
-                                       page.locator(selector).first.inner_text()
+                        handle = page.query_selector(selector)
+                        if handle:
+                            product_id = handle.get_attribute('data-product-id') or \
+                                       handle.get_attribute('data-sku-id') or \
+                                       handle.get_attribute('data-goods-id') or \
+                                       handle.inner_text()
                             if product_id:
                                 info['product_id'] = str(product_id).strip()
                                 break
@@ -129,8 +131,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
         
         for selector in shop_selectors:
             try:
-                if page.locator(selector).count() > 0:
-                    shop_name = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    shop_name = handle.inner_text().strip()
                     if shop_name and '店铺' not in shop_name.lower() and '商家' not in shop_name.lower():
                         info['shop_name'] = shop_name
                         break
@@ -147,8 +150,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
         
         for selector in brand_selectors:
             try:
-                if page.locator(selector).count() > 0:
-                    brand = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    brand = handle.inner_text().strip()
                     if brand:
                         info['brand'] = brand
                         break
@@ -164,8 +168,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
                 '.crumb-category'
             ]
             for selector in category_selectors:
-                if page.locator(selector).count() > 0:
-                    category = page.locator(selector).first.inner_text().strip()
+                handle = page.query_selector(selector)
+                if handle:
+                    category = handle.inner_text().strip()
                     if category:
                         info['category'] = category
                         break
@@ -183,10 +188,11 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
             ]
             for selector in image_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        image_url = page.locator(selector).first.get_attribute('src') or \
-                                  page.locator(selector).first.get_attribute('data-src') or \
-                                  page.locator(selector).first.get_attribute('data-original')
+                    handle = page.query_selector(selector)
+                    if handle:
+                        image_url = handle.get_attribute('src') or \
+                                  handle.get_attribute('data-src') or \
+                                  handle.get_attribute('data-original')
                         if image_url:
                             info['image_url'] = image_url
                             break
@@ -205,8 +211,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
             ]
             for selector in stock_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        stock_text = page.locator(selector).first.inner_text().strip()
+                    handle = page.query_selector(selector)
+                    if handle:
+                        stock_text = handle.inner_text().strip()
                         if stock_text:
                             info['stock_status'] = stock_text
                             break
@@ -225,8 +232,9 @@ def extract_suning_product_info(page: Page, url: str) -> Dict[str, Any]:
             ]
             for selector in review_selectors:
                 try:
-                    if page.locator(selector).count() > 0:
-                        review_text = page.locator(selector).first.inner_text().strip()
+                    handle = page.query_selector(selector)
+                    if handle:
+                        review_text = handle.inner_text().strip()
                         if review_text:
                             info['review_count'] = review_text
                             break
@@ -381,8 +389,9 @@ def extract_suning_skus(page: Page) -> List[Dict[str, Any]]:
                             name_selectors = ['span', 'div', '.sku-name', '.spec-name', '.variation-name']
                             for name_selector in name_selectors:
                                 try:
-                                    if element.locator(name_selector).count() > 0:
-                                        name = element.locator(name_selector).first.inner_text().strip()
+                                    handle = element.query_selector(name_selector)
+                                    if handle:
+                                        name = handle.inner_text().strip()
                                         if name:
                                             sku_info['name'] = name
                                             break
@@ -393,8 +402,9 @@ def extract_suning_skus(page: Page) -> List[Dict[str, Any]]:
                             price_selectors = ['.sku-price', '.spec-price', '.variation-price', '.price']
                             for price_selector in price_selectors:
                                 try:
-                                    if element.locator(price_selector).count() > 0:
-                                        price_text = element.locator(price_selector).first.inner_text().strip()
+                                    handle = element.query_selector(price_selector)
+                                    if handle:
+                                        price_text = handle.inner_text().strip()
                                         if price_text:
                                             price, currency = parse_suning_price_text(price_text)
                                             if price is not None:
@@ -406,10 +416,11 @@ def extract_suning_skus(page: Page) -> List[Dict[str, Any]]:
                             
                             # SKU图片（如果有）
                             try:
-                                if element.locator('img').count() > 0:
-                                    image_url = element.locator('img').first.get_attribute('src') or \
-                                              element.locator('img').first.get_attribute('data-src') or \
-                                              element.locator('img').first.get_attribute('data-original')
+                                handle = element.query_selector('img')
+                                if handle:
+                                    image_url = handle.get_attribute('src') or \
+                                              handle.get_attribute('data-src') or \
+                                              handle.get_attribute('data-original')
                                     if image_url:
                                         sku_info['image_url'] = image_url
                             except Exception:
@@ -417,8 +428,9 @@ def extract_suning_skus(page: Page) -> List[Dict[str, Any]]:
                             
                             # SKU库存（如果有）
                             try:
-                                if element.locator('.sku-stock').count() > 0:
-                                    stock_text = element.locator('.sku-stock').first.inner_text().strip()
+                                handle = element.query_selector('.sku-stock')
+                                if handle:
+                                    stock_text = handle.inner_text().strip()
                                     if stock_text:
                                         sku_info['stock'] = stock_text
                             except Exception:
@@ -426,6 +438,8 @@ def extract_suning_skus(page: Page) -> List[Dict[str, Any]]:
                             
                             if sku_info:
                                 skus.append(sku_info)
+                        except Exception:
+                            continue
                     
                     if skus:  # 找到SKU就停止
                         break
@@ -501,7 +515,8 @@ def is_suning_product_page(url: str) -> bool:
         return False
     
     # 检查域名
-    domain = urlparse(url).netloc.lower()
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
     
     suning_domains = [
         'suning.com', 'suning.cn', 'suning.net',
@@ -514,7 +529,7 @@ def is_suning_product_page(url: str) -> bool:
         return False
     
     # 检查路径是否包含商品标识
-    path = urlparse(url).path.lower()
+    path = parsed.path.lower()
     product_indicators = ['/product/', '/goods/', '/item/', '/detail/', '/item-']
     
     return any(indicator in path for indicator in product_indicators)
@@ -11,6 +11,10 @@ from urllib.parse import urlparse, parse_qs
 from playwright.sync_api import Page
 
 
+# 在浏览器中一次读取所有规格选项的文本
+_SKU_TEXTS_JS = "(elements) => elements.slice(0, 10).map((el) => (el.innerText || '').trim())"
+
+
 def parse_taobao_price(text: Optional[str]) -> Tuple[Optional[float], str]:
     """
     解析淘宝价格文本
@@ -139,8 +143,9 @@ def extract_taobao_product_info(page: Page, url: str) -> Dict[str, Any]:
     
     for selector in title_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                title = page.locator(selector).first.inner_text().strip()
+            handle = page.query_selector(selector)
+            if handle:
+                title = handle.inner_text().strip()
                 if title:
                     info['title'] = title
                     break
@@ -161,8 +166,9 @@ def extract_taobao_product_info(page: Page, url: str) -> Dict[str, Any]:
     
     for selector in shop_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                shop = page.locator(selector).first.inner_text().strip()
+            handle = page.query_selector(selector)
+            if handle:
+                shop = handle.inner_text().strip()
                 if shop:
                     info['shop_name'] = shop
                     break
@@ -177,8 +183,9 @@ def extract_taobao_product_info(page: Page, url: str) -> Dict[str, Any]:
             '.tm-ind-sellCount'
         ]
         for selector in sales_selectors:
-            if page.locator(selector).count() > 0:
-                sales_text = page.locator(selector).first.inner_text()
+            handle = page.query_selector(selector)
+            if handle:
+                sales_text = handle.inner_text()
                 sales_match = re.search(r'(\d+)', sales_text.replace(',', ''))
                 if sales_match:
                     info['sales_count'] = int(sales_match.group(1))
@@ -217,8 +224,9 @@ def extract_taobao_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], L
     
     for selector in price_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                price_text = page.locator(selector).first.inner_text()
+            handle = page.query_selector(selector)
+            if handle:
+                price_text = handle.inner_text()
                 if price_text:
                     extracted_price, extracted_currency = parse_taobao_price(price_text)
                     if extracted_price is not None:
@@ -258,24 +266,20 @@ def extract_taobao_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any], L
         ]
         
         for selector in sku_selectors:
-            if page.locator(selector).count() > 0:
-                items = page.locator(selector)
-                for i in range(min(items.count(), 10)):  # 限制最多10个变体
-                    try:
-                        el = items.nth(i)
-                        sku_text = el.inner_text().strip()
-                        if sku_text:
-                            skus.append({
-                                "asin": None,  # 淘宝没有ASIN
-                                "name": sku_text,
-                                "url": url,  # 淘宝SKU通常共享同一URL
-                                "attributes": {
-                                    "sku_text": sku_text,
-                                    "platform": "taobao"
-                                }
-                            })
-                    except Exception:
-                        continue
+            sku_texts = page.locator(selector).evaluate_all(_SKU_TEXTS_JS)  # 限制最多10个变体
+            if sku_texts:
+                skus = [
+                    {
+                        "asin": None,  # 淘宝没有ASIN
+                        "name": sku_text,
+                        "url": url,  # 淘宝SKU通常共享同一URL
+                        "attributes": {
+                            "sku_text": sku_text,
+                            "platform": "taobao"
+                        }
+                    }
+                    for sku_text in sku_texts if sku_text
+                ]
                 break
     except Exception:
         pass
@@ -296,7 +300,8 @@ def is_taobao_product_page(url: str) -> bool:
     if not url:
         return False
     
-    domain = urlparse(url).netloc.lower()
+    parsed = urlparse(url)
+    domain = parsed.netloc.lower()
     taobao_domains = ['taobao.com', 'tmall.com', 'detail.tmall.com', 'item.taobao.com']
     
     is_taobao = any(d in domain for d in taobao_domains)
@@ -304,5 +309,5 @@ def is_taobao_product_page(url: str) -> bool:
         return False
     
     # 检查路径
-    path = urlparse(url).path.lower()
+    path = parsed.path.lower()
     return '/item/' in path or '/detail/' in path or 'item_id=' in url
\ No newline at end of file
@@ -13,6 +13,13 @@ from .taobao import extract_taobao_spu_and_skus as extract_taobao, is_taobao_pro
 from .jd import extract_jd_spu_and_skus as extract_jd, is_jd_product_page
 
 
+# 货币符号（取文本中最先出现的符号）
+_CURRENCY_BY_SYMBOL = {
+    '$': 'USD', '£': 'GBP', '€': 'EUR', '￥': 'CNY', '¥': 'CNY',
+    '₹': 'INR', '₽': 'RUB', '₩': 'KRW'
+}
+
+
 def detect_site_type(url: str) -> str:
     """
     检测网站类型
@@ -50,23 +57,8 @@ def parse_generic_price(text: Optional[str]) -> Tuple[Optional[float], Optional[
     s = text.strip().replace('\n', ' ').replace('\t', ' ')
     s = re.sub(r'\s+', ' ', s)
     
-    currency = None
-    
     # 检测货币符号
-    if '$' in s:
-        currency = "USD"
-    elif '£' in s:
-        currency = "GBP"
-    elif '€' in s:
-        currency = "EUR"
-    elif '￥' in s or '¥' in s:
-        currency = "CNY"
-    elif '₹' in s:
-        currency = "INR"
-    elif '₽' in s:
-        currency = "RUB"
-    elif '₩' in s:
-        currency = "KRW"
+    currency = next((_CURRENCY_BY_SYMBOL[ch] for ch in s if ch in _CURRENCY_BY_SYMBOL), None)
     
     # 提取数字
     price_pattern = r'[\d,]+\.?\d*'
@@ -157,8 +149,9 @@ def extract_generic_product_info(page: Page, url: str) -> Dict[str, Any]:
     
     for selector in title_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                title = page.locator(selector).first.inner_text().strip()
+            handle = page.query_selector(selector)
+            if handle:
+                title = handle.inner_text().strip()
                 if title and len(title) > 5:  # 过滤太短的标题
                     info['title'] = title
                     break
@@ -185,8 +178,9 @@ def extract_generic_product_info(page: Page, url: str) -> Dict[str, Any]:
     
     for selector in brand_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                brand = page.locator(selector).first.inner_text().strip()
+            handle = page.query_selector(selector)
+            if handle:
+                brand = handle.inner_text().strip()
                 if brand:
                     info['brand'] = brand
                     break
@@ -203,8 +197,9 @@ def extract_generic_product_info(page: Page, url: str) -> Dict[str, Any]:
     
     for selector in desc_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                desc = page.locator(selector).first.inner_text().strip()
+            handle = page.query_selector(selector)
+            if handle:
+                desc = handle.inner_text().strip()
                 if desc and len(desc) > 10:
                     info['description'] = desc[:500]  # 限制长度
                     break
@@ -242,9 +237,8 @@ def extract_generic_spu_and_skus(page: Page, url: str) -> Tuple[Dict[str, Any],
     
     for selector in price_selectors:
         try:
-            if page.locator(selector).count() > 0:
-                price_element = page.locator(selector).first
-                
+            price_element = page.query_selector(selector)
+            if price_element:
                 # 尝试从data属性获取价格
                 data_price = price_element.get_attribute('data-price')
                 if data_price:
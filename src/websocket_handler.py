@@ -10,10 +10,10 @@ from datetime import datetime
 import websockets
 from websockets.server import WebSocketServerProtocol
 
-from ..config.config import config
-from ..dao.supabase_repo import SupabaseRepo
-from ..services.price_history_service import PriceHistoryService
-from ..services.enhanced_price_scraper import EnhancedPriceScraper, ScrapingConfig
+from .config.config import config
+from .dao.supabase_repo import SupabaseRepo
+from .services.price_history_service import PriceHistoryService
+from .services.enhanced_price_scraper import EnhancedPriceScraper, ScrapingConfig
 
 
 class WebSocketHandler:
@@ -0,0 +1,99 @@
+import os
+import sys
+import statistics
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import numpy as np
+import pytest
+from spider.src.services.price_history_service import (
+    PriceHistoryService,
+    PriceSeries,
+    _rolling_mean_std,
+    _rolling_mean_std_numpy,
+    _rolling_mean_std_welford,
+)
+
+
+PRICES = [10.0, 12.5, 11.0, 11.0, 15.25, 9.75, 10.0, 30.0, 12.0, 12.0, 12.0, 8.5]
+
+
+@pytest.mark.parametrize("kernel", [_rolling_mean_std, _rolling_mean_std_numpy, _rolling_mean_std_welford])
+def test_rolling_mean_std_matches_statistics(kernel):
+    window = 5
+    means, stds = kernel(np.array(PRICES, dtype=np.float64), window)
+    assert len(means) == len(stds) == len(PRICES) - window + 1
+    for i in range(len(means)):
+        chunk = PRICES[i:i + window]
+        assert means[i] == pytest.approx(statistics.mean(chunk))
+        assert stds[i] == pytest.approx(statistics.stdev(chunk), abs=1e-9)
+
+
+def _series(prices):
+    start = np.datetime64("2024-01-01T00:00:00")
+    rows = [
+        {"created_at": str(start + np.timedelta64(day, "D")) + "Z", "price": p, "currency": "USD"}
+        for day, p in enumerate(prices)
+    ]
+    return PriceSeries.from_rows(rows)
+
+
+def _service(series):
+    service = PriceHistoryService.__new__(PriceHistoryService)
+    service.get_price_series = lambda product_id, days=30, granularity='daily': series
+    return service
+
+
+def test_predict_price_linear_trend():
+    # y = 2x + 100，x = 0..39
+    service = _service(_series([2.0 * x + 100.0 for x in range(40)]))
+    result = service.predict_price(1, days=3)
+    assert result["trend_slope"] == pytest.approx(2.0)
+    assert [p["day"] for p in result["predictions"]] == [1, 2, 3]
+    assert [p["predicted_price"] for p in result["predictions"]] == pytest.approx([180.0, 182.0, 184.0])
+    for p in result["predictions"]:
+        assert p["lower_bound"] == pytest.approx(p["predicted_price"])
+        assert p["upper_bound"] == pytest.approx(p["predicted_price"])
+
+
+def test_predict_price_matches_polyfit():
+    prices = [100.0 + 0.5 * x + (3.0 if x % 3 == 0 else -1.5) for x in range(35)]
+    slope, intercept = np.polyfit(np.arange(35), prices, 1)
+    result = _service(_series(prices)).predict_price(1, days=1)
+    assert result["trend_slope"] == pytest.approx(slope)
+    assert result["predictions"][0]["predicted_price"] == pytest.approx(slope * 35 + intercept)
+    assert result["predictions"][0]["lower_bound"] < result["predictions"][0]["predicted_price"]
+
+
+def test_predict_price_needs_enough_data():
+    result = _service(_series([10.0] * 29)).predict_price(1)
+    assert "error" in result
+
+
+def test_price_series_sorted_by_time():
+    rows = [
+        {"created_at": "2024-03-02T08:00:00Z", "price": 20.0, "currency": "CNY"},
+        {"created_at": "2024-03-01T00:00:00+08:00", "price": 10.0, "currency": "CNY"},
+        {"created_at": "2024-03-01T12:00:00Z", "price": "15.5", "currency": "CNY"},
+    ]
+    series = PriceSeries.from_rows(rows)
+    assert len(series) == 3
+    assert series.prices.tolist() == [10.0, 15.5, 20.0]
+    assert np.all(np.diff(series.timestamps) > np.timedelta64(0, "ns"))
+    points = series.to_points()
+    assert [p.price for p in points] == [10.0, 15.5, 20.0]
+    assert points[0].timestamp == "2024-03-01T00:00:00+08:00"
+    assert points[0].currency == "CNY"
+
+
+def test_summarize_fetches_series_once():
+    prices = [100.0 + (x % 5) for x in range(31)]
+    prices[15] = 400.0
+    series = _series(prices)
+    calls = []
+    service = PriceHistoryService.__new__(PriceHistoryService)
+    service.get_price_series = lambda *args, **kwargs: calls.append(args) or series
+    summary = service.summarize(1, days=30)
+    assert len(calls) == 1
+    assert summary["trend"].data_points == 31
+    assert summary["trend"].end_price == prices[-1]
+    assert summary["statistics"]
+    assert [a["price"] for a in summary["anomalies"]] == [400.0]
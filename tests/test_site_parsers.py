@@ -0,0 +1,49 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from spider.src.sites.amazon import parse_price_text, is_amazon_product_page
+from spider.src.sites.jd import parse_jd_price, is_jd_product_page
+
+
+def test_parse_price_text_currency_and_amount():
+    assert parse_price_text("$1,299.99") == (1299.99, "USD")
+    assert parse_price_text("£ 49.5") == (49.5, "GBP")
+    assert parse_price_text("EUR 19,99 €") == (1999.0, "EUR")
+    assert parse_price_text("￥3,999") == (3999.0, "CNY")
+    assert parse_price_text("CAD 25.00") == (25.0, "CAD")
+    assert parse_price_text("$12.345") == (12.34, "USD")
+
+
+def test_parse_price_text_invalid():
+    assert parse_price_text("") == (None, None)
+    assert parse_price_text(None) == (None, None)
+    assert parse_price_text("$") == (None, "USD")
+    assert parse_price_text("$1.2.3") == (None, "USD")
+
+
+def test_parse_jd_price():
+    assert parse_jd_price("￥5,999.00") == (5999.0, "CNY")
+    assert parse_jd_price("¥ 12.5") == (12.5, "CNY")
+    assert parse_jd_price("￥99.00-199.00") == (99.0, "CNY")
+    assert parse_jd_price("暂无报价") == (None, "CNY")
+    assert parse_jd_price("1.2.3") == (None, "CNY")
+    assert parse_jd_price(None) == (None, "CNY")
+
+
+def test_is_amazon_product_page():
+    assert is_amazon_product_page("https://www.amazon.com/dp/B08N5WRWNW")
+    assert is_amazon_product_page("https://smile.amazon.co.uk/gp/product/B08N5WRWNW")
+    assert is_amazon_product_page("https://amazon.co.jp/Some-Item/dp/B08N5WRWNW?th=1")
+    assert not is_amazon_product_page("https://www.amazon.com/s?k=laptop")
+    assert not is_amazon_product_page("https://amazon.com.evil.net/dp/B08N5WRWNW")
+    assert not is_amazon_product_page("https://notamazon.com/dp/B08N5WRWNW")
+    assert not is_amazon_product_page("")
+
+
+def test_is_jd_product_page():
+    assert is_jd_product_page("https://item.jd.com/100012043978.html")
+    assert is_jd_product_page("https://jd.com/product/100012043978.html")
+    assert not is_jd_product_page("https://search.jd.com/Search?keyword=phone")
+    assert not is_jd_product_page("https://notjd.com/100012043978.html")
+    assert not is_jd_product_page("https://item.jd.com.evil.net/100012043978.html")
+    assert not is_jd_product_page("")